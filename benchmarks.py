@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks for the `pytimeparse2` module.
+
+Run ``python benchmarks.py`` from the source tree.
+"""
+
+import re
+import timeit
+import tracemalloc
+
+import pytimeparse2
+
+CORPUS = [
+    '32m',
+    '2h32m',
+    '1w 3d 2h 32m',
+    '4:13:02.266',
+    '2 days, 4:13:02',
+    '5 hours, 34 minutes, 56 seconds',
+    '1.2 minutes',
+    '1y2mo3w4d5h6m7s8ms',
+    '-1.5 s',
+    '10',
+    'not a duration',
+]
+
+
+def bench(title, func, number=20000, values=len(CORPUS)):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f'{title:<40} {seconds / number / values * 1e6:8.3f} usec per value')
+    return seconds
+
+
+def bench_parse():
+    bench('parse', lambda: [pytimeparse2.parse(sval) for sval in CORPUS])
+
+
+def bench_relativedelta():
+    relativedelta = pytimeparse2.relativedelta
+    mdict = {'days': '2', 'hours': '5', 'minutes': '34', 'seconds': '56.5'}
+    created = []
+
+    class CountingRelativeDelta(relativedelta):  # type: ignore
+        def __init__(self, *args, **kwargs):
+            created.append(1)
+            super().__init__(*args, **kwargs)
+
+    def normalized():
+        # The way relativedelta results were built before: float components,
+        # ``.normalized()`` and sign multiplication.
+        return -1 * pytimeparse2.relativedelta(**{key: float(value) for key, value in mdict.items()}).normalized()
+
+    def fast_path():
+        return pytimeparse2._relativedelta_from_match(-1, mdict)
+
+    assert normalized() == fast_path()
+    for title, func in (('relativedelta via normalized()', normalized), ('relativedelta fast path', fast_path)):
+        bench(title, func, values=1)
+        pytimeparse2.relativedelta, created[:] = CountingRelativeDelta, []
+        try:
+            func()
+        finally:
+            pytimeparse2.relativedelta = relativedelta
+        print(f'{"":<40} {len(created):8d} relativedelta objects per value')
+
+
+def bench_interning(size=100000):
+    config_values = [f'{index % 60 + 1} min' for index in range(size)]
+
+    def load_config():
+        tracemalloc.start()
+        try:
+            config = [pytimeparse2.parse(sval, as_timedelta=True) for sval in config_values]
+            return tracemalloc.get_traced_memory()[0], config
+        finally:
+            tracemalloc.stop()
+
+    memory, _ = load_config()
+    print(f'{"config without interning":<40} {memory / 1024:8.0f} KiB for {size} values')
+    pytimeparse2.enable_interning()
+    try:
+        memory, _ = load_config()
+    finally:
+        pytimeparse2.disable_interning()
+    print(f'{"config with interning":<40} {memory / 1024:8.0f} KiB for {size} values')
+
+
+def bench_range():
+    ranges = ['5-10 min', '30s to 2m', '1h..3h', '1.5 - 2.5 hours', '2 days..3 days, 4:13:02']
+    separator = re.compile(r'\s*(?:-|\.\.|\bto\b)\s*')
+    unit = re.compile(r'[\d.]+\s*([a-z]+)')
+
+    def split_and_parse(sval):
+        # The way ranges were parsed before ``parse_range``.
+        low, high = separator.split(sval, 1)
+        if low.replace('.', '', 1).isdigit():
+            low += unit.match(high).group(1)
+        return pytimeparse2.parse(low), pytimeparse2.parse(high)
+
+    assert [split_and_parse(sval) for sval in ranges] == [pytimeparse2.parse_range(sval) for sval in ranges]
+    bench('ranges via split and parse', lambda: [split_and_parse(sval) for sval in ranges], values=len(ranges))
+    bench('parse_range', lambda: [pytimeparse2.parse_range(sval) for sval in ranges], values=len(ranges))
+
+
+def bench_try_parse():
+    invalid = ['ten', '1h 30x', 'abc def', '1x']
+
+    def raise_and_catch():
+        for sval in invalid:
+            try:
+                pytimeparse2.parse(sval, raise_exception=True)
+            except ValueError:
+                pass
+
+    bench('parse with raise_exception=True', raise_and_catch, values=len(invalid))
+    bench('try_parse value', lambda: [pytimeparse2.try_parse(sval).value for sval in invalid], values=len(invalid))
+    bench('try_parse error', lambda: [pytimeparse2.try_parse(sval).error for sval in invalid], values=len(invalid))
+
+
+def main():
+    bench_parse()
+    bench_relativedelta()
+    bench_interning()
+    bench_range()
+    bench_try_parse()
+
+
+if __name__ == '__main__':
+    main()
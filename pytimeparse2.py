@@ -33,8 +33,18 @@ kinds of time expressions.
 __version__ = '1.7.1'
 
 import typing
+import itertools
+import json
+import math
+import os
 import re
-from datetime import timedelta
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from fractions import Fraction
+from types import MappingProxyType
 
 try:
     from dateutil.relativedelta import relativedelta
@@ -58,9 +68,21 @@ NANOS = r'(?P<nanoseconds>[\d.]+)\s*(?:ns|nsecs?|nanos?|nanoseconds?)'
 SEPARATORS = r'[,/]'
 SECCLOCK = r':(?P<seconds>\d{2}(?:\.\d+)?)'
 MINCLOCK = r'(?P<minutes>\d{1,2}):(?P<seconds>\d{2}(?:\.\d+)?)'
+HOURMINCLOCK = r'(?P<hours>\d{1,2}):(?P<minutes>\d{2})'
+SECFRACCLOCK = r':(?P<seconds>\d{2}\.\d+)'
+MINFRACCLOCK = r'(?P<minutes>\d{1,2}):(?P<seconds>\d{2}\.\d+)'
 HOURCLOCK = r'(?P<hours>\d+):(?P<minutes>\d{2}):(?P<seconds>\d{2}(?:\.\d+)?)'
 DAYCLOCK = (r'(?P<days>\d+):(?P<hours>\d{2}):'
             r'(?P<minutes>\d{2}):(?P<seconds>\d{2}(?:\.\d+)?)')
+ISONUMBER = r'\d+(?:[.,]\d+)?'
+ISO8601 = (rf'P(?:(?P<years>{ISONUMBER})Y)?(?:(?P<months>{ISONUMBER})M)?'
+           rf'(?:(?P<weeks>{ISONUMBER})W)?(?:(?P<days>{ISONUMBER})D)?'
+           rf'(?:T(?=\d)(?:(?P<hours>{ISONUMBER})H)?(?:(?P<minutes>{ISONUMBER})M)?(?:(?P<seconds>{ISONUMBER})S)?)?')
+GO_COMPONENT = r'(\d+(?:\.\d*)?|\.\d+)(ns|us|\u00b5s|\u03bcs|ms|s|m|h)'
+PROMETHEUS = (r'(?:(?P<years>\d+)y)?(?:(?P<weeks>\d+)w)?(?:(?P<days>\d+)d)?(?:(?P<hours>\d+)h)?'
+              r'(?:(?P<minutes>\d+)m)?(?:(?P<seconds>\d+)s)?(?:(?P<milliseconds>\d+)ms)?')
+EXPRESSION_DURATION = r'(?:\d+(?:\.\d*)?|\.\d+)\s*[a-wyz\u00b5\u03bc]+\.?'
+EXPRESSION_CLOCK = r'\d+(?::\d+)+(?:\.\d+)?'
 
 MULTIPLIERS = {
     'years': 60 * 60 * 24 * 365,
@@ -72,51 +94,236 @@ MULTIPLIERS = {
     'seconds': 1,
     'milliseconds': 1e-3,
     'microseconds': 1e-6,
-    'nanoseconds': 1e-,
+    'nanoseconds': 1e-9,
 }
+NANOSECOND_MULTIPLIERS = {key: round(value * 10 ** 9) for key, value in MULTIPLIERS.items()}
+# Divisor for exact conversion of integer nanoseconds.
+NANOSECONDS_PER_SECOND = NANOSECOND_MULTIPLIERS['seconds']
+MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+GO_UNITS = {
+    'ns': 'nanoseconds',
+    'us': 'microseconds',
+    '\u00b5s': 'microseconds',
+    '\u03bcs': 'microseconds',
+    'ms': 'milliseconds',
+    's': 'seconds',
+    'm': 'minutes',
+    'h': 'hours',
+}
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+# Unit names of ``YEARS``...``NANOS`` patterns, in the order of ``MULTIPLIERS``.
+UNIT_ALIASES = {
+    'years': ('y', 'ys', 'yr', 'yrs', 'yr.', 'yrs.', 'year', 'years'),
+    'months': ('mo', 'mos', 'mo.', 'mos.', 'mth', 'mths', 'mth.', 'mths.', 'month', 'months'),
+    'weeks': ('w', 'wk', 'wks', 'week', 'weeks'),
+    'days': ('d', 'dy', 'dys', 'day', 'days'),
+    'hours': ('h', 'hr', 'hrs', 'hour', 'hours'),
+    'minutes': ('m', 'min', 'mins', 'minute', 'minutes'),
+    'seconds': ('s', 'sec', 'secs', 'second', 'seconds'),
+    'milliseconds': ('ms', 'msec', 'msecs', 'milli', 'millis', 'millisecond', 'milliseconds'),
+    'microseconds': (
+        'µs', 'us', 'µsec', 'µsecs', 'usec', 'usecs', 'micro', 'micros', 'microsecond', 'microseconds',
+    ),
+    'nanoseconds': ('ns', 'nsec', 'nsecs', 'nano', 'nanos', 'nanosecond', 'nanoseconds'),
+}
+UNIT_INDEXES = {
+    alias.casefold(): index
+    for index, aliases in enumerate(UNIT_ALIASES.values())
+    for alias in aliases
+}
+# Greatest unit index for every prefix of aliases, so `IncrementalParser`
+# checks a typed unit with one lookup.
+UNIT_PREFIXES = {
+    prefix: max(index for alias, index in UNIT_INDEXES.items() if alias.startswith(prefix))
+    for prefix in {alias[:end] for alias in UNIT_INDEXES for end in range(1, len(alias) + 1)}
+}
+# Nanoseconds which round (half to even) to microseconds within timedelta range.
+TIMEDELTA_MAX_NANOSECONDS = (timedelta.max // timedelta.resolution) * 1000 + 499
+TIMEDELTA_MIN_NANOSECONDS = (timedelta.min // timedelta.resolution) * 1000 - 500
+TIMEDELTA_MAX_SECONDS = timedelta.max.total_seconds()
+OVERFLOW_POLICIES = ('none', 'raise', 'saturate')
+DIALECTS = ('go', 'prometheus')
+INTERNED_RESULTS: typing.Optional[typing.Dict[timedelta, timedelta]] = None
+INTERNED_RESULTS_MAXSIZE = 0
+PERSISTENT_CACHE: typing.Optional['_PersistentCache'] = None
+PRELOADED: typing.Optional[typing.Mapping[typing.Tuple[str, typing.Optional[str]], typing.Mapping[str, tuple]]] = None
+EXPRESSION_PROGRAMS: typing.Dict[typing.Tuple[str, str], tuple] = {}
+EXPRESSION_PROGRAMS_MAXSIZE = 1024
+EXPRESSION_PRECEDENCES = {'+': 1, '-': 1, '*': 2, '/': 2, 'neg': 3}
+# Exact conversion of numbers is quadratic in their length, so longer ones are
+# rejected as by default limit of ``int`` conversion in Python 3.11.
+EXPRESSION_MAX_DIGITS = 4300
+# Arithmetic is quadratic in length of operands, so intermediate values (and
+# denominators) beyond this magnitude, far above ``timedelta`` range in
+# nanoseconds, are rejected and long chains of products stay linear.
+EXPRESSION_MAX_VALUE = 2 ** 128
+NAN = float('nan')
 
 
 def OPT(x):
-    return r'(?:{x})?'.format(x=x)
+    return r'(?:{x}\s*)?'.format(x=x)
 
 
 def OPTSEP(x):
     return r'(?:{x}\s*(?:{SEPARATORS}\s*)?)?'.format(x=x, SEPARATORS=SEPARATORS)
 
 
+# Every optional group consumes whitespace after itself, so there are no
+# adjacent ``\s*`` between groups and every run of spaces or digits could be
+# consumed by only one quantifier.  Otherwise backtracking could split long
+# runs between them in polynomial number of ways.  For the same reason
+# compiled formats have no trailing ``\s*``: values are stripped before match.
 TIMEFORMATS = [
-    (rf'{OPTSEP(YEARS)}\s*'
-     rf'{OPTSEP(MONTHS)}\s*'
-     rf'{OPTSEP(WEEKS)}\s*'
-     rf'{OPTSEP(DAYS)}\s*'
-     rf'{OPTSEP(HOURS)}\s*'
-     rf'{OPTSEP(MINS)}\s*'
-     rf'{OPT(SECS)}\s*'
-     rf'{OPT(MILLIS)}\s*'
-     rf'{OPT(MICROS)}\s*'
+    (rf'{OPTSEP(YEARS)}'
+     rf'{OPTSEP(MONTHS)}'
+     rf'{OPTSEP(WEEKS)}'
+     rf'{OPTSEP(DAYS)}'
+     rf'{OPTSEP(HOURS)}'
+     rf'{OPTSEP(MINS)}'
+     rf'{OPT(SECS)}'
+     rf'{OPT(MILLIS)}'
+     rf'{OPT(MICROS)}'
      rf'{OPT(NANOS)}'),
-    rf'{OPTSEP(WEEKS)}\s*{OPTSEP(DAYS)}\s*{OPTSEP(HOURS)}\s*{OPTSEP(MINS)}\s*{OPT(SECS)}\s*{OPT(MILLIS)}\s*{OPT(MICROS)}\s*{OPT(NANOS)}',
+    rf'{OPTSEP(WEEKS)}{OPTSEP(DAYS)}{OPTSEP(HOURS)}{OPTSEP(MINS)}{OPT(SECS)}{OPT(MILLIS)}{OPT(MICROS)}{OPT(NANOS)}',
     rf'{MINCLOCK}',
-    rf'{OPTSEP(WEEKS)}\s*{OPTSEP(DAYS)}\s*{HOURCLOCK}',
+    rf'{OPTSEP(WEEKS)}{OPTSEP(DAYS)}{HOURCLOCK}',
     rf'{DAYCLOCK}',
     rf'{SECCLOCK}',
     rf'{YEARS}',
     rf'{MONTHS}',
 ]
+# With ``minutes`` granularity clocks with single colon and without fraction
+# mean hours and minutes, so groups are named that way in patterns instead of
+# renaming matched values on every call.
+# Such ``SECCLOCK`` is not a time expression with this granularity.
+MINUTES_TIMEFORMATS = [
+    *TIMEFORMATS[:2],
+    rf'{HOURMINCLOCK}',
+    rf'{MINFRACCLOCK}',
+    *TIMEFORMATS[3:5],
+    rf'{SECFRACCLOCK}',
+    *TIMEFORMATS[6:],
+]
 
-COMPILED_SIGN = re.compile(r'\s*' + SIGN + r'\s*(?P<unsigned>.*)$')
+COMPILED_SIGN = re.compile(r'\s*' + SIGN + r'\s*(?P<unsigned>.*)$', re.S)
+COMPILED_ISO8601 = re.compile(ISO8601 + r'$', re.I)
+COMPILED_GO_COMPONENT = re.compile(GO_COMPONENT)
+COMPILED_PROMETHEUS = re.compile(PROMETHEUS + r'$')
+# Expressions are normalized by `_normalize` before match, so formats are
+# case-sensitive and not padded.  Non-ASCII expressions which they do not
+# match are checked with ``re.I`` formats, so units still match characters
+# like Greek ``μ`` case-insensitively.
 COMPILED_TIMEFORMATS = [
-    re.compile(r'\s*' + timefmt + r'\s*$', re.I)
+    re.compile(timefmt + r'$')
+    for timefmt in TIMEFORMATS
+]
+COMPILED_MINUTES_TIMEFORMATS = [
+    re.compile(timefmt + r'$')
+    for timefmt in MINUTES_TIMEFORMATS
+]
+COMPILED_UNICODE_TIMEFORMATS = [
+    re.compile(timefmt + r'$', re.I)
+    for timefmt in TIMEFORMATS
+]
+COMPILED_UNICODE_MINUTES_TIMEFORMATS = [
+    re.compile(timefmt + r'$', re.I)
+    for timefmt in MINUTES_TIMEFORMATS
+]
+COMPILED_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+# Every component below 10 ** 6 (of any unit) fits in ``timedelta``, so only
+# expressions with a longer run of digits could overflow it.
+COMPILED_LONG_DIGITS = re.compile(r'\d{7}')
+COMPILED_PARTIAL_TIMEFORMATS = [
+    re.compile(r'\s*' + timefmt, re.I)
     for timefmt in TIMEFORMATS
 ]
+COMPILED_PARTIAL_MINUTES_TIMEFORMATS = [
+    re.compile(r'\s*' + timefmt, re.I)
+    for timefmt in MINUTES_TIMEFORMATS
+]
+COMPILED_FLOAT = re.compile(r'(?:\d+(?:\.\d*)?|\.\d+)(?:e[+-]?\d+)?$', re.I)
+COMPILED_NUMBER = re.compile(r'\s*[\d.]+\s*')
+# Separator is searched only from the first space of the run, so long runs
+# of spaces are not rescanned from every position.
+COMPILED_RANGE_SEPARATOR = re.compile(r'(?<!\s)\s*(?:-|\u2013|\.\.)\s*|(?<!\s)\s+to\s+', re.I)
+COMPILED_RANGE_UNIT = re.compile(r'[\d.]+\s*([a-z\u00b5\u03bc]+\.?)', re.I)
+# Units never contain ``x``, so it is the multiplication sign between terms.
+# Components of duration term are separated only by spaces and commas,
+# slash is the division.
+COMPILED_EXPRESSION_TOKEN = re.compile(
+    rf'\s*(?:(?P<duration>{EXPRESSION_DURATION}(?:[\s,]*{EXPRESSION_DURATION})*(?:[\s,]*{EXPRESSION_CLOCK})?)'
+    rf'|(?P<clock>{EXPRESSION_CLOCK})'
+    r'|(?P<number>\d+(?:\.\d*)?|\.\d+)'
+    r'|(?P<operator>[-+*/x\u00d7()]))',
+    re.I,
+)
+COMPILED_INVALID_CHAR = re.compile(r'[^\d\s.:,/|+\-a-zµ]', re.I)
 
 
-def _all_digits(mdict, delta_class):
-    if HAS_RELITIVE_TIMEDELTA and issubclass(delta_class, relativedelta):
-        if 'milliseconds' in mdict:
-            mdict['microseconds'] = float(mdict.pop('milliseconds') or 0) * 1000
-        return delta_class(**{k: float(v) for k, v in mdict.items() if v}).normalized()
+class ParseError(typing.NamedTuple):
+    """
+    Description of failed parsing returned by `try_parse`.
+
+    - `position`: index of the first character which could not be parsed
+    - `expected`: what was expected at this position: ``number`` or ``unit``
+    - `units`: names of units which could follow already parsed part
+    - `patterns`: indexes of ``COMPILED_TIMEFORMATS`` (``COMPILED_MINUTES_TIMEFORMATS`` with
+      ``minutes`` granularity) which partially matched
+    - `message`: human readable description
+    """
+    position: int
+    expected: str
+    units: typing.Tuple[str, ...]
+    patterns: typing.Tuple[int, ...]
+    message: str
+
+
+class ParseResult:
+    """
+    Result of `try_parse`: parsed ``value`` or ``error`` description.
+    Details of unmatched expressions are collected only on first access
+    of ``error``, so checking ``value`` stays cheap.
+    """
+    __slots__ = ('value', '_error', '_source')
+
+    def __init__(
+            self,
+            value: typing.Optional[typing.Union[int, float, timedelta]],
+            error: typing.Optional[ParseError] = None,
+            source: typing.Optional[typing.Tuple[str, str]] = None,
+    ):
+        self.value = value
+        self._error = error
+        self._source = source
+
+    @property
+    def error(self) -> typing.Optional[ParseError]:
+        if self._error is None and self._source is not None:
+            self._error = _diagnose(*self._source)
+        return self._error
+
+    def __iter__(self):
+        return iter((self.value, self.error))
 
+    def __repr__(self):
+        return f'ParseResult(value={self.value!r}, error={self.error!r})'
+
+
+class DurationStats(typing.NamedTuple):
+    """
+    Aggregates of time expressions returned by `parse_stats`.  Values are
+    number of seconds or, with ``as_nanoseconds=True``, integer number of
+    nanoseconds.  ``min``, ``max`` and ``mean`` are ``None`` if nothing was parsed.
+    """
+    count: int  # type: ignore
+    failures: int
+    total: typing.Union[int, float]
+    min: typing.Optional[typing.Union[int, float]]
+    max: typing.Optional[typing.Union[int, float]]
+    mean: typing.Optional[typing.Union[int, float]]
+
+
+def _all_digits(mdict, delta_class):
     delta = delta_class(**{
         key: float(mdict.pop(key) or 0)
         for key in mdict.copy()
@@ -134,59 +341,357 @@ def _all_digits(mdict, delta_class):
     return delta
 
 
-def _interpret_as_minutes(sval, mdict):
-    """
-    Times like "1:22" are ambiguous; do they represent minutes and seconds
-    or hours and minutes?  By default, parse assumes the latter.  Call
-    this function after parsing out a dictionary to change that assumption.
+def _decimal_to_nanoseconds(value: str, multiplier: int) -> int:
+    if not value.replace('.', '', 1).isdigit():
+        raise ValueError(f'could not convert string to float: {value!r}')
+    whole, _, fraction = value.partition('.')
+    result = int(whole or '0', 10) * multiplier
+    if fraction:
+        scale = 10 ** len(fraction)
+        result += (int(fraction, 10) * multiplier + scale // 2) // scale
+    return result
 
-    >>> import pprint
-    >>> pprint.pprint(_interpret_as_minutes('1:24', {'seconds': '24', 'minutes': '1'}))
-    {'hours': '1', 'minutes': '24'}
-    """
-    if sval.count(':') == 1 and '.' not in sval and (('hours' not in mdict) or (mdict['hours'] is None)) and (
-            ('days' not in mdict) or (mdict['days'] is None)) and (('weeks' not in mdict) or (mdict['weeks'] is None)) \
-            and (('months' not in mdict) or (mdict['months'] is None)) \
-            and (('years' not in mdict) or (mdict['years'] is None)):
-        mdict['hours'] = mdict['minutes']
-        mdict['minutes'] = mdict['seconds']
-        mdict.pop('seconds')
-    return mdict
+
+def _timedelta_from_nanoseconds(nanoseconds: int) -> timedelta:
+    # Half of microsecond is rounded away from zero, as in `_make_relativedelta`.
+    microseconds = (abs(nanoseconds) + 500) // 1000
+    return timedelta(microseconds=-microseconds if nanoseconds < 0 else microseconds)
+
+
+def _make_relativedelta(sign: int, months: int, nanoseconds: int) -> timedelta:
+    microseconds = (nanoseconds + 500) // 1000
+    seconds, microseconds = divmod(microseconds, 1000000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    return relativedelta(  # type: ignore
+        months=sign * months,
+        days=sign * days,
+        hours=sign * hours,
+        minutes=sign * minutes,
+        seconds=sign * seconds,
+        microseconds=sign * microseconds,
+    )
+
+
+def _calendar_count(value: str) -> typing.Optional[int]:
+    # Whole number of years or months (``1.0`` too), ``None`` for fractional ones.
+    if not value.replace('.', '', 1).isdigit():
+        raise ValueError(f'could not convert string to float: {value!r}')
+    whole, _, fraction = value.partition('.')
+    return None if fraction.strip('0') else int(whole or '0', 10)
+
+
+def _calendar_from_match(mdict: typing.Dict[str, typing.Any]) -> typing.Tuple[int, int]:
+    # Integral years and months are calendar months, other units are summed
+    # as exact nanoseconds.
+    months, nanoseconds = 0, 0
+    for key, value in mdict.items():
+        if not value:
+            continue
+        if key in ('years', 'months'):
+            count = _calendar_count(value)
+            if count is None:
+                raise ValueError('Non-integer years and months are ambiguous')
+            months += count * (12 if key == 'years' else 1)
+        else:
+            nanoseconds += _decimal_to_nanoseconds(value, NANOSECOND_MULTIPLIERS[key])
+    return months, nanoseconds
+
+
+def _relativedelta_from_match(sign: int, mdict: typing.Dict[str, typing.Any]) -> timedelta:
+    # Components are summed as integers and normalized before the only
+    # ``relativedelta`` is built, so there is no ``.normalized()`` and sign
+    # multiplication copies.
+    return _make_relativedelta(sign, *_calendar_from_match(mdict))
+
+
+def _normalize(sval: str) -> str:
+    # Characters like ``İ`` are lowercased to several ones, such values are
+    # left to ``re.I`` formats as they are.
+    collapsed = ' '.join(sval.split())
+    lowered = collapsed.lower()
+    return lowered if len(lowered) == len(collapsed) else collapsed
+
+
+def _could_start_format(sval: str) -> bool:
+    # Every format starts with a number or a colon, so other expressions are
+    # rejected without trying them (``isdigit`` covers non-ASCII ``\d`` too).
+    return sval[:1].isdigit() or sval[:1] in ('.', ':')
 
 
-def _normilized_relativedelta(value: typing.Optional[timedelta]) -> typing.Optional[timedelta]:
-    if relativedelta is not None and isinstance(value, relativedelta):
-        return value.normalized()
-    return value
+def _split_sign(sval: str) -> typing.Tuple[int, str]:
+    # Normalized value could have only one space after sign.
+    if sval[:1] not in ('+', '-', '|'):
+        return 1, sval
+    return -1 if sval[0] == '-' else 1, sval[2:] if sval[1:2] == ' ' else sval[1:]
+
+
+def _match(
+        sval: str,
+        granularity: str,
+        dialect: typing.Optional[str] = None,
+) -> typing.Tuple[int, str, typing.Optional[typing.Dict[str, typing.Any]]]:
+    # Dialects are case-sensitive and strict, other expressions are
+    # normalized first, so they share entries of tables and caches.
+    if dialect is None:
+        sval = _normalize(sval)
+    if PRELOADED is not None:
+        table = PRELOADED.get(('minutes' if granularity == 'minutes' else 'seconds', dialect))
+        entry = table.get(sval) if table is not None else None
+        if entry is not None:
+            sign, unsigned, items = entry
+            return sign, unsigned, None if items is None else dict(items)
+    cache = PERSISTENT_CACHE
+    if cache is not None:
+        return cache.match(sval, granularity, dialect)
+    return _match_expression(sval, granularity, dialect)
+
+
+def _match_expression(
+        sval: str,
+        granularity: str,
+        dialect: typing.Optional[str] = None,
+) -> typing.Tuple[int, str, typing.Optional[typing.Dict[str, typing.Any]]]:
+    if dialect is not None:
+        return _match_dialect(sval, dialect)
+
+    sign, sval = _split_sign(sval)
+    if sval[:1] in ('p', 'P'):
+        return sign, sval, _match_iso8601(sval)
+    if not _could_start_format(sval):
+        return sign, sval, None
+
+    for timefmt in COMPILED_MINUTES_TIMEFORMATS if granularity == 'minutes' else COMPILED_TIMEFORMATS:
+        match = timefmt.match(sval)
+        if match and match.end():
+            return sign, sval, match.groupdict()
+
+    if COMPILED_NON_ASCII.search(sval):
+        if granularity == 'minutes':
+            unicode_timeformats = COMPILED_UNICODE_MINUTES_TIMEFORMATS
+        else:
+            unicode_timeformats = COMPILED_UNICODE_TIMEFORMATS
+        for timefmt in unicode_timeformats:
+            match = timefmt.match(sval)
+            if match and match.end():
+                return sign, sval, match.groupdict()
+
+    return sign, sval, None
+
+
+def _match_iso8601(sval: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    # ISO 8601 durations never reach ``COMPILED_TIMEFORMATS`` and unit
+    # designators are distinct, so matching is single pass without backtracking.
+    match = COMPILED_ISO8601.match(sval)
+    if not (match and match.lastindex):
+        return None
+    return {key: value.replace(',', '.') for key, value in match.groupdict().items() if value}
+
+
+def _add_decimals(first: str, second: str) -> str:
+    # Exact sum of two unsigned decimal strings (``float`` would round them).
+    first_whole, _, first_fraction = first.partition('.')
+    second_whole, _, second_fraction = second.partition('.')
+    digits = max(len(first_fraction), len(second_fraction))
+    first_scaled = int(first_whole + first_fraction.ljust(digits, '0') or '0', 10)
+    second_scaled = int(second_whole + second_fraction.ljust(digits, '0') or '0', 10)
+    total = str(first_scaled + second_scaled).rjust(digits + 1, '0')
+    return f'{total[:-digits]}.{total[-digits:]}' if digits else total
+
+
+def _match_dialect(sval: str, dialect: str) -> typing.Tuple[int, str, typing.Dict[str, typing.Any]]:
+    # Strict grammars of Go ``time.ParseDuration`` and Prometheus durations.
+    # Units are case sensitive and there is no whitespace, so "m" and "ms"
+    # are never ambiguous and every component is scanned once from left to right.
+    mdict: typing.Dict[str, typing.Any]
+    if dialect == 'prometheus':
+        if sval == '0':
+            return 1, sval, {}
+        match = COMPILED_PROMETHEUS.match(sval)
+        if sval and match:
+            mdict = {key: value for key, value in match.groupdict().items() if value}
+            if 'years' in mdict:
+                # Prometheus year is 365 days, not calendar one.
+                mdict['days'] = str(int(mdict.pop('years'), 10) * 365 + int(mdict.get('days', '0'), 10))
+            return 1, sval, mdict
+    else:
+        sign = -1 if sval[:1] == '-' else 1
+        unsigned = sval[1:] if sval[:1] in ('+', '-') else sval
+        if unsigned == '0':
+            return sign, unsigned, {}
+        mdict = {}
+        position = 0
+        while position < len(unsigned):
+            match = COMPILED_GO_COMPONENT.match(unsigned, position)
+            if match is None:
+                break
+            # As in Go, units could go in any order and repeated ones are summed.
+            unit, value = GO_UNITS[match.group(2)], match.group(1)
+            mdict[unit] = _add_decimals(mdict[unit], value) if unit in mdict else value
+            position = match.end()
+        if mdict and position == len(unsigned):
+            return sign, unsigned, mdict
+    raise ValueError(f'Invalid {dialect} duration: {sval!r}')
+
+
+def _check_dialect(dialect: typing.Optional[str]):
+    # Unknown dialect is a caller error, so it is raised instead of being
+    # reported as unparsed value.
+    if dialect is not None and dialect not in DIALECTS:
+        raise ValueError(f'Unknown dialect {dialect!r}, expected one of {DIALECTS}.')
+
+
+def _overflow(sign: float, sval: typing.Any, overflow: str) -> typing.Optional[timedelta]:
+    if overflow == 'saturate':
+        return timedelta.max if sign > 0 else timedelta.min
+    if overflow == 'none':
+        return None
+    raise OverflowError(f'Time expression {sval!r} is out of timedelta range.')
+
+
+def _exceeds_timedelta(sval: str, mdict: typing.Dict[str, typing.Any]) -> bool:
+    # Cheap check of digits first, exact sum only for long numbers.
+    if len(sval) < 7 or not COMPILED_LONG_DIGITS.search(sval):
+        return False
+    return sum(
+        _decimal_to_nanoseconds(value, NANOSECOND_MULTIPLIERS[key])
+        for key, value in mdict.items()
+        if value and value.replace('.', '', 1).isdigit()
+    ) > TIMEDELTA_MAX_NANOSECONDS
+
+
+def _delta_from_seconds(seconds: float, sval: typing.Any, overflow: str) -> typing.Optional[timedelta]:
+    if abs(seconds) > TIMEDELTA_MAX_SECONDS:
+        return _overflow(seconds, sval, overflow)
+    try:
+        return timedelta(seconds=seconds)
+    except OverflowError:
+        # Rounding to microseconds at the very end of the range.
+        return _overflow(seconds, sval, overflow)
+
+
+def _delta_from_match(sign, sval, mdict, delta_class, overflow='raise'):
+    if mdict is None:
+        return _delta_from_seconds(sign * float(sval), sval, overflow)
+
+    if HAS_RELITIVE_TIMEDELTA and issubclass(delta_class, relativedelta):
+        return _relativedelta_from_match(sign, mdict)
+
+    if _exceeds_timedelta(sval, mdict):
+        return _overflow(sign, sval, overflow)
+    try:
+        return sign * _all_digits(mdict, delta_class)
+    except OverflowError:
+        return _overflow(sign, sval, overflow)
+
+
+def _nanoseconds_from_match(sign, sval, mdict) -> int:
+    if mdict is None:
+        if sval.replace('.', '', 1).isdigit():
+            return sign * _decimal_to_nanoseconds(sval, NANOSECOND_MULTIPLIERS['seconds'])
+        return sign * round(float(sval) * 10 ** 9)
+
+    return sign * sum(
+        _decimal_to_nanoseconds(value, NANOSECOND_MULTIPLIERS[key])
+        for key, value in mdict.items()
+        if value
+    )
+
+
+def _total_seconds(value: timedelta) -> typing.Union[int, float]:
+    new_value = value.total_seconds()
+    if new_value.is_integer():
+        return int(new_value)
+    return new_value
+
+
+def _value_from_match(
+        sign: int,
+        sval: str,
+        mdict: typing.Optional[typing.Dict[str, typing.Any]],
+        as_timedelta: bool,
+        as_nanoseconds: bool,
+) -> typing.Union[int, float, timedelta]:
+    if as_nanoseconds:
+        return _nanoseconds_from_match(sign, sval, mdict)
+    delta_class = relativedelta if HAS_RELITIVE_TIMEDELTA and as_timedelta else timedelta
+    value = _delta_from_match(sign, sval, mdict, delta_class)
+    return _intern(value) if as_timedelta else _total_seconds(value)  # type: ignore
+
+
+def _is_number(sval: typing.Union[str, int, float], dialect: typing.Optional[str]) -> bool:
+    # Bare numbers are seconds and are converted without matching formats.
+    return isinstance(sval, (int, float)) or (
+        dialect is None and sval.replace('.', '', 1).replace('-', '', 1).replace('+', '', 1).isdigit()
+    )
 
 
 def _parse(
         sval: typing.Union[str, int, float],
         granularity: str = 'seconds',
-        delta_class: typing.Type[timedelta] = timedelta
+        delta_class: typing.Type[timedelta] = timedelta,
+        dialect: typing.Optional[str] = None,
+        overflow: str = 'raise',
 ) -> typing.Optional[timedelta]:
+    if _is_number(sval, dialect):
+        # ``int`` beyond ``float`` range is handled before conversion, so
+        # ``float()`` does not raise before the overflow policy applies.
+        if HAS_RELITIVE_TIMEDELTA and issubclass(delta_class, relativedelta):
+            nanoseconds = sval * 10 ** 9 if isinstance(sval, int) else round(float(sval) * 10 ** 9)
+            return _make_relativedelta(-1 if nanoseconds < 0 else 1, 0, abs(nanoseconds))
+        if isinstance(sval, int) and abs(sval) > TIMEDELTA_MAX_SECONDS:
+            return _overflow(-1 if sval < 0 else 1, sval, overflow)
+        return _delta_from_seconds(float(sval), sval, overflow)
+
+    return _delta_from_match(*_match(sval, granularity, dialect), delta_class, overflow)  # type: ignore
+
+
+def _parse_nanoseconds(
+        sval: typing.Union[str, int, float],
+        granularity: str = 'seconds',
+        dialect: typing.Optional[str] = None,
+) -> int:
     if isinstance(sval, (int, float)):
-        return _normilized_relativedelta(delta_class(seconds=float(sval)))
-    if sval.replace('.', '', 1).replace('-', '', 1).replace('+', '', 1).isdigit():
-        return _normilized_relativedelta(delta_class(seconds=float(sval)))
+        return round(sval * 10 ** 9)
 
-    match = COMPILED_SIGN.match(sval)
-    sign = -1 if match.groupdict()['sign'] == '-' else 1  # type: ignore
-    sval = match.groupdict()['unsigned']  # type: ignore
+    return _nanoseconds_from_match(*_match(sval, granularity, dialect))
 
-    for timefmt in COMPILED_TIMEFORMATS:
-        match = timefmt.match(sval)
 
+def _diagnose(sval: str, granularity: str = 'seconds') -> ParseError:
+    # Positions are found in the original value, not the normalized one.
+    sign = COMPILED_SIGN.match(sval)
+    offset, unsigned = sign.start('unsigned'), sign.group('unsigned').rstrip()  # type: ignore
+    end, units, patterns = 0, set(), []
+    if granularity == 'minutes':
+        partial_timeformats = COMPILED_PARTIAL_MINUTES_TIMEFORMATS
+    else:
+        partial_timeformats = COMPILED_PARTIAL_TIMEFORMATS
+    for index, timefmt in enumerate(partial_timeformats if _could_start_format(unsigned) else ()):
+        match = timefmt.match(unsigned)
         if not (match and match.group(0).strip()):
             continue
+        patterns.append(index)
+        end = max(end, match.end())
+        names = sorted(timefmt.groupindex, key=timefmt.groupindex.__getitem__)
+        parsed = [i for i, name in enumerate(names) if match.group(name) is not None]
+        units.update(names[parsed[-1] + 1:] if parsed else names)
 
-        mdict = match.groupdict()
-        if granularity == 'minutes':
-            mdict = _interpret_as_minutes(sval, mdict)
-
-        return sign * _all_digits(mdict, delta_class)
+    number = COMPILED_NUMBER.match(unsigned, end)
+    if number:
+        end, expected = number.end(), 'unit'
+    else:
+        expected = 'number'
+    if not patterns:
+        units.update(MULTIPLIERS)
 
-    return timedelta(seconds=float(sval)) * sign
+    return ParseError(
+        position=offset + end,
+        expected=expected,
+        units=tuple(unit for unit in MULTIPLIERS if unit in units),
+        patterns=tuple(patterns),
+        message=f'Expected {expected} at position {offset + end} in {sval!r}.',
+    )
 
 
 def enable_dateutil():
@@ -200,11 +705,281 @@ def disable_dateutil():
     HAS_RELITIVE_TIMEDELTA = False
 
 
+def enable_interning(maxsize: int = 4096):
+    """
+    Make ``parse(..., as_timedelta=True)`` return the same object for equal
+    results, so long-living structures share them.  Up to ``maxsize`` distinct
+    results are kept, the oldest ones are evicted first.  Shared objects
+    should not be mutated.
+    """
+    global INTERNED_RESULTS, INTERNED_RESULTS_MAXSIZE
+    assert maxsize > 0, 'Interning table size should be positive.'
+    INTERNED_RESULTS, INTERNED_RESULTS_MAXSIZE = {}, maxsize
+
+
+def disable_interning():
+    global INTERNED_RESULTS
+    INTERNED_RESULTS = None
+
+
+def _intern(value: typing.Optional[timedelta]) -> typing.Optional[timedelta]:
+    table = INTERNED_RESULTS
+    if table is None or value is None:
+        return value
+    interned = table.get(value)
+    if interned is None:
+        if len(table) >= INTERNED_RESULTS_MAXSIZE:
+            table.pop(next(iter(table)), None)
+        interned = table[value] = value
+    return interned
+
+
+class _PersistentCache:
+    # Matched expressions are kept in ``sqlite3`` database in WAL mode, so
+    # processes read it concurrently without blocking each other.  Rows
+    # read or written by this process are also kept in bounded dictionary.
+    # Only matched expressions are written and the number of rows is kept in
+    # ``meta``, so untrusted input could not grow the file without limit.
+    # Keys start with the module version, so workers of different versions
+    # never read rows of each other.
+    __slots__ = ('path', 'maxsize', 'max_rows', 'local', '_threads', '_connections', '_pid', '_full')
+
+    def __init__(self, path: str, maxsize: int, max_rows: int):
+        import threading
+
+        self.path, self.maxsize, self.max_rows = path, maxsize, max_rows
+        self.local: typing.Dict[str, typing.Tuple[int, str, typing.Optional[typing.Dict[str, typing.Any]]]] = {}
+        self._threads = threading.local()
+        self._connections: typing.List[typing.Any] = []
+        self._pid = 0
+        self._full = False
+        self.connection()
+
+    def connection(self) -> typing.Any:
+        # Connection could not be shared with forked children, and concurrent
+        # transactions could not share one, so every thread of every process
+        # opens its own one on first use.
+        if self._pid != os.getpid():
+            self._connections, self._pid, self.local, self._full = [], os.getpid(), {}, False
+        if getattr(self._threads, 'connections', None) is not self._connections:
+            self._threads.connection, self._threads.connections = self._open(), self._connections
+            self._connections.append(self._threads.connection)
+        return self._threads.connection
+
+    def _open(self) -> typing.Any:
+        import sqlite3
+
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+            connection.execute('CREATE TABLE IF NOT EXISTS matches (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+            version = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if version != (__version__,):
+                connection.execute('DELETE FROM matches')
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (__version__,))
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('rows', '0')")
+            elif connection.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone() is None:
+                rows = connection.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+                connection.execute("INSERT INTO meta VALUES ('rows', ?)", (str(rows),))
+        finally:
+            connection.execute('COMMIT')
+        return connection
+
+    def store(self, key: str, result: tuple):
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            meta = dict(connection.execute("SELECT name, value FROM meta WHERE name IN ('version', 'rows')"))
+            rows = int(meta['rows'])
+            # Database could be reset by workers of other version after open.
+            if meta['version'] != __version__ or rows >= self.max_rows:
+                self._full = True
+            elif connection.execute(
+                    'INSERT OR IGNORE INTO matches VALUES (?, ?)',
+                    (key, json.dumps(result, separators=(',', ':'))),
+            ).rowcount:
+                connection.execute("UPDATE meta SET value = ? WHERE name = 'rows'", (str(rows + 1),))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def match(
+            self,
+            sval: str,
+            granularity: str,
+            dialect: typing.Optional[str],
+    ) -> typing.Tuple[int, str, typing.Optional[typing.Dict[str, typing.Any]]]:
+        key = f'{__version__}:{"minutes" if granularity == "minutes" else "seconds"}:{dialect or ""}:{sval}'
+        result = self.local.get(key)
+        if result is None:
+            result = self._lookup(key, sval, granularity, dialect)
+            if len(self.local) >= self.maxsize:
+                self.local.pop(next(iter(self.local)), None)
+            self.local[key] = result
+        # Results are consumed destructively, so only copies are returned.
+        sign, unsigned, mdict = result
+        return sign, unsigned, None if mdict is None else dict(mdict)
+
+    def _lookup(
+            self,
+            key: str,
+            sval: str,
+            granularity: str,
+            dialect: typing.Optional[str],
+    ) -> typing.Tuple[int, str, typing.Optional[typing.Dict[str, typing.Any]]]:
+        # Database errors (locked or read-only file, closed connection, broken
+        # rows) never change results: expression is just matched by patterns.
+        import sqlite3
+
+        try:
+            row = self.connection().execute('SELECT value FROM matches WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                return tuple(json.loads(row[0]))  # type: ignore
+        except (sqlite3.Error, ValueError):
+            pass
+        result = _match_expression(sval, granularity, dialect)
+        if result[2] is not None and not self._full:
+            try:
+                self.store(key, result)
+            except (sqlite3.Error, LookupError, ValueError):
+                pass
+        return result
+
+    def close(self):
+        if self._pid == os.getpid():
+            for connection in self._connections:
+                connection.close()
+        self._connections, self._pid = [], 0
+
+
+def enable_cache(path: str, maxsize: int = 4096, max_rows: int = 65536):
+    """
+    Keep matched time expressions in persistent ``sqlite3`` database at
+    ``path``, shared by all processes which enable it with the same path
+    (e.g. prefork server workers).  Every distinct expression is matched by
+    patterns only once and then read from the database; up to ``maxsize``
+    entries are also kept in memory of every process.  Opening is constant
+    time, entries are read on demand.  Entries written by other version of
+    the module are dropped on open and never read.  Every thread opens its
+    own connection, and database errors fall back to matching by patterns.
+
+    Unparsed expressions are not written, and the database stops growing
+    at ``max_rows`` entries: new expressions are still matched, but only
+    kept in memory.
+    """
+    global PERSISTENT_CACHE
+    assert maxsize > 0, 'Cache size should be positive.'
+    disable_cache()
+    PERSISTENT_CACHE = _PersistentCache(path, maxsize, max_rows)
+
+
+def disable_cache():
+    global PERSISTENT_CACHE
+    if PERSISTENT_CACHE is not None:
+        PERSISTENT_CACHE.close()
+    PERSISTENT_CACHE = None
+
+
+def _preloaded_entry(sval: str, granularity: str, dialect: typing.Optional[str]) -> typing.Optional[tuple]:
+    try:
+        sign, unsigned, mdict = _match_expression(sval, granularity, dialect)
+    except ValueError:
+        return None
+    items = None if mdict is None else tuple((key, value) for key, value in mdict.items() if value)
+    return sign, unsigned, items
+
+
+def _set_preloaded(tables: typing.Dict[typing.Tuple[str, typing.Optional[str]], typing.Dict[str, tuple]]):
+    global PRELOADED
+    PRELOADED = MappingProxyType({mode: MappingProxyType(table) for mode, table in tables.items()})
+
+
+def preload(
+        svals: typing.Iterable[str],
+        granularity: str = 'seconds',
+        dialect: typing.Optional[str] = None,
+) -> int:
+    """
+    Match known time expressions up front and keep them in read-only table,
+    which is looked up by `parse` and other functions before any regex
+    work.  Calls for other ``granularity`` or ``dialect`` use their own
+    tables.  Expressions rejected by ``dialect`` are not stored.  Returns the
+    number of expressions in the table.
+
+    >>> preload(['1h 30m', '2 days, 4:13:02'])
+    2
+    >>> parse('1h 30m')
+    5400
+    >>> clear_preloaded()
+    """
+    _check_dialect(dialect)
+    mode = ('minutes' if granularity == 'minutes' else 'seconds', dialect)
+    tables = {key: dict(table) for key, table in (PRELOADED or {}).items()}
+    table = tables.setdefault(mode, {})
+    for sval in svals:
+        key = _normalize(sval) if dialect is None else sval
+        if key not in table:
+            entry = _preloaded_entry(key, granularity, dialect)
+            if entry is not None:
+                table[key] = entry
+    _set_preloaded(tables)
+    return len(table)
+
+
+def clear_preloaded():
+    global PRELOADED
+    PRELOADED = None
+
+
+def dump_preloaded(fp: typing.TextIO):
+    """
+    Write tables filled by `preload` into text file ``fp`` as compact JSON,
+    so they could be restored by `load_preloaded` without matching.
+    """
+    json.dump(
+        {
+            'version': __version__,
+            'tables': [
+                {'granularity': granularity, 'dialect': dialect, 'entries': dict(table)}
+                for (granularity, dialect), table in (PRELOADED or {}).items()
+            ],
+        },
+        fp,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+
+
+def load_preloaded(fp: typing.TextIO):
+    """
+    Replace tables of `preload` with ones written by `dump_preloaded` to
+    text file ``fp``.  Files written by other version of the module are
+    rejected with `ValueError`, because they could be matched differently.
+    """
+    data = json.load(fp)
+    if data.get('version') != __version__:
+        raise ValueError(f'Preloaded expressions were dumped by version {data.get("version")}, not {__version__}.')
+    _set_preloaded({
+        (table['granularity'], table['dialect']): {
+            sval: (sign, unsigned, None if items is None else tuple(map(tuple, items)))
+            for sval, (sign, unsigned, items) in table['entries'].items()
+        }
+        for table in data['tables']
+    })
+
+
 def parse(
         sval: typing.Union[str, int, float],
         granularity: str = 'seconds',
         raise_exception: bool = False,
         as_timedelta: bool = False,
+        as_nanoseconds: bool = False,
+        dialect: typing.Optional[str] = None,
+        overflow: str = 'none',
 ) -> typing.Optional[typing.Union[int, float, timedelta, typing.NoReturn]]:
     """
     Parse a time expression, returning it as a number of seconds.  If
@@ -217,6 +992,10 @@ def parse(
     - `granularity`: minimal type of digits after last colon (default is ``seconds``)
     - `raise_exception`: raise exception on parsing errors (default is ``False``)
     - `as_timedelta`: return ``datetime.timedelta`` object instead of ``int`` (default is ``False``)
+    - `as_nanoseconds`: return exact ``int`` number of nanoseconds (default is ``False``)
+    - `dialect`: parse only strict ``go`` or ``prometheus`` duration syntax (default is ``None``)
+    - `overflow`: policy for values out of ``timedelta`` range: ``none``, ``raise`` or ``saturate``
+      (default is ``none``)
 
     >>> parse('1:24')
     84
@@ -253,6 +1032,37 @@ def parse(
     >>> parse('48:00', as_timedelta=True, granularity='minutes')
     relativedelta(days=+2)
 
+    ISO 8601 durations are supported too.
+
+    >>> parse('PT1H30M')
+    5400
+    >>> parse('-P1DT0.5S', as_timedelta=True)
+    relativedelta(days=-1, microseconds=-500000)
+
+    If ``as_nanoseconds`` is specified as ``True``, then return integer number
+    of nanoseconds computed without intermediate ``float`` or ``timedelta``.
+
+    >>> parse('1.5 us', as_nanoseconds=True)
+    1500
+    >>> parse('200 days 1 ns', as_nanoseconds=True)
+    17280000000000001
+
+    If interning is enabled by ``enable_interning()``, then equal timedelta
+    results are the same object.
+
+    >>> enable_interning()
+    >>> parse('1h', as_timedelta=True) is parse('60 min', as_timedelta=True)
+    True
+    >>> disable_interning()
+
+    If ``dialect`` is specified as ``go`` or ``prometheus``, then only strict
+    duration syntax of that language is accepted, without general patterns.
+
+    >>> parse('1h30m0.5s', dialect='go'), parse('300ms', dialect='go')
+    (5400.5, 0.3)
+    >>> parse('2d', dialect='prometheus'), parse('1h 30m', dialect='go')
+    (172800, None)
+
     If ``raise_exception`` is specified as ``True``, then exception will raised
     on failed parsing.
 
@@ -260,17 +1070,1224 @@ def parse(
     Traceback (most recent call last):
         ...
     ValueError: could not convert string to float: ':1.1.1'
+
+    Values out of ``timedelta`` range are found by number of digits before
+    any ``timedelta`` is built.  With ``overflow='none'`` they are ``None``
+    (or raise with ``raise_exception``), ``raise`` always raises
+    ``OverflowError`` and ``saturate`` clamps them to ``timedelta.max`` or
+    ``timedelta.min``.  Nanoseconds and ``relativedelta`` have no range limit.
+
+    >>> parse('99999999999 years'), parse('-99999999999 years', overflow='saturate')
+    (None, -86399999913600)
     """
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError(f'Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}.')
+    _check_dialect(dialect)
     try:
-        value = _parse(sval, granularity, relativedelta if HAS_RELITIVE_TIMEDELTA and as_timedelta else timedelta)
+        if as_nanoseconds:
+            return _parse_nanoseconds(sval, granularity, dialect)
+        value = _parse(
+            sval,
+            granularity,
+            relativedelta if HAS_RELITIVE_TIMEDELTA and as_timedelta else timedelta,
+            dialect,
+            'raise' if raise_exception and overflow == 'none' else overflow,
+        )
         if not as_timedelta and value is not None:
-            new_value = value.total_seconds()
-            if new_value.is_integer():
-                return int(new_value)
+            return _total_seconds(value)
+        return _intern(value)
+    except Exception as exc:
+        if raise_exception or (overflow == 'raise' and isinstance(exc, OverflowError)):
+            raise
+        return None
+
+
+def _within_limits(
+        nanoseconds: typing.Union[int, Decimal],
+        max_value: typing.Optional[typing.Union[int, float]],
+) -> bool:
+    if max_value is not None and not -max_value * 10 ** 9 <= nanoseconds <= max_value * 10 ** 9:
+        return False
+    return TIMEDELTA_MIN_NANOSECONDS <= nanoseconds <= TIMEDELTA_MAX_NANOSECONDS
+
+
+def is_duration(
+        sval: typing.Union[str, int, float],
+        granularity: str = 'seconds',
+        max_length: typing.Optional[int] = None,
+        max_value: typing.Optional[typing.Union[int, float]] = None,
+        dialect: typing.Optional[str] = None,
+) -> bool:
+    """
+    Check that time expression could be parsed without building its value.
+    Numbers are checked with integer arithmetic only (no ``float`` or
+    ``timedelta``), so it is the fast path for validators.  Strings longer
+    than ``max_length`` are rejected before any regex work, as are strings
+    with characters which could not appear in time expression.  If
+    ``max_value`` is specified, then absolute value of expression in seconds
+    should not exceed it.
+
+    >>> is_duration('1h 30m'), is_duration('1h 30x')
+    (True, False)
+    >>> is_duration('1h 30m', max_length=5), is_duration('1h 30m', max_value=3600)
+    (False, False)
+    """
+    _check_dialect(dialect)
+    value: typing.Union[int, Decimal]
+    if not isinstance(sval, str):
+        # Exact value of ``int`` or ``float``, so limits are the same as for strings.
+        value = Decimal(sval)
+        if not value.is_finite():
+            return False
+        return _within_limits(value.scaleb(9), max_value)
+    if max_length is not None and len(sval) > max_length:
+        return False
+    if COMPILED_INVALID_CHAR.search(sval):
+        return False
+
+    try:
+        sign, unsigned, mdict = _match(sval, granularity, dialect)
+        if mdict is None:
+            if not COMPILED_FLOAT.match(unsigned):
+                return False
+            if unsigned.replace('.', '', 1).isdigit():
+                value = _decimal_to_nanoseconds(unsigned, NANOSECOND_MULTIPLIERS['seconds'])
+            elif Decimal(unsigned).adjusted() < 15:
+                value = Decimal(unsigned).scaleb(9)
+            else:
+                return False
+        elif all(not value or value.replace('.', '', 1).isdigit() for value in mdict.values()):
+            value = _nanoseconds_from_match(1, unsigned, mdict)
+        else:
+            return False
+    except ValueError:
+        # Also digits beyond the limit of ``int`` conversion, as in `parse`.
+        return False
+    return _within_limits(sign * value, max_value)
+
+
+def try_parse(
+        sval: typing.Union[str, int, float],
+        granularity: str = 'seconds',
+        as_timedelta: bool = False,
+        as_nanoseconds: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> ParseResult:
+    """
+    Parse a time expression like `parse` does, but return `ParseResult`
+    with either parsed ``value`` or structured ``error`` instead of raising
+    or returning ``None``.  Checking ``value`` of unmatched expressions is
+    cheaper than catching exceptions of ``parse``; ``error`` details cost
+    more, as all partial formats are tried (see ``benchmarks.py``).
+
+    >>> try_parse('1h 30m')
+    ParseResult(value=5400, error=None)
+    >>> result = try_parse('1h 30x')
+    >>> result.value is None, result.error.position, result.error.expected
+    (True, 5, 'unit')
+    >>> result.error.units
+    ('minutes', 'seconds', 'milliseconds', 'microseconds', 'nanoseconds')
+    """
+    _check_dialect(dialect)
+    unsigned = ''
+    try:
+        if not isinstance(sval, str) or (
+                dialect is None and sval.replace('.', '', 1).replace('-', '', 1).replace('+', '', 1).isdigit()
+        ):
+            return ParseResult(parse(sval, granularity, True, as_timedelta, as_nanoseconds), None)
+
+        sign, unsigned, mdict = _match(sval, granularity, dialect)
+        if mdict is None and not COMPILED_FLOAT.match(unsigned):
+            return ParseResult(None, source=(sval, granularity))
+
+        return ParseResult(_value_from_match(sign, unsigned, mdict, as_timedelta, as_nanoseconds), None)
+    except Exception as error:
+        position = COMPILED_SIGN.match(sval).start('unsigned') if isinstance(sval, str) else 0  # type: ignore
+        return ParseResult(None, ParseError(position, 'number', (), (), str(error)))
+
+
+def parse_range(
+        sval: str,
+        granularity: str = 'seconds',
+        raise_exception: bool = False,
+        as_timedelta: bool = False,
+        as_nanoseconds: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> typing.Optional[typing.Tuple[typing.Any, typing.Any]]:
+    """
+    Parse range of time expressions like ``5-10 min``, ``30s to 2m`` or
+    ``1h..3h`` into ``(low, high)`` pair.  If the lower bound is a plain
+    number, it takes the unit of the upper one.  Bounds are converted like
+    in `parse` and kept in the written order.  Returns ``None`` if the range
+    cannot be parsed.
+
+    >>> parse_range('5-10 min')
+    (300, 600)
+    >>> parse_range('30s to 2m'), parse_range('1h..1h30m', as_nanoseconds=True)
+    ((30, 120), (3600000000000, 5400000000000))
+    """
+    _check_dialect(dialect)
+    try:
+        start = COMPILED_SIGN.match(sval).start('unsigned')  # type: ignore
+        separator = COMPILED_RANGE_SEPARATOR.search(sval, start + 1)
+        if separator is None:
+            raise ValueError(f'Range separator not found in {sval!r}')
+        low, high = sval[:separator.start()], sval[separator.end():]
+
+        high_sign, high_unsigned, high_mdict = _match(high, granularity, dialect)
+        if dialect is None and low[start:].replace('.', '', 1).isdigit():
+            unit = COMPILED_RANGE_UNIT.match(high_unsigned)
+            if unit is not None:
+                low += unit.group(1)
+        low_sign, low_unsigned, low_mdict = _match(low, granularity, dialect)
+        return (
+            _value_from_match(low_sign, low_unsigned, low_mdict, as_timedelta, as_nanoseconds),
+            _value_from_match(high_sign, high_unsigned, high_mdict, as_timedelta, as_nanoseconds),
+        )
+    except Exception:
+        if raise_exception:
+            raise
+        return None
+
+
+def _compile_expression(sval: str, granularity: str) -> tuple:
+    # Shunting-yard conversion of tokens to reverse polish notation, so both
+    # tokenizing and evaluation are single loops without recursion.  Duration
+    # terms are parsed to integer nanoseconds once, numbers to exact fractions.
+    program: typing.List[typing.Any] = []
+    operators: typing.List[str] = []
+    expect_operand = True
+    position, end = 0, len(sval.rstrip())
+    while position < end:
+        token = COMPILED_EXPRESSION_TOKEN.match(sval, position, end)
+        if token is None:
+            raise ValueError(f'Invalid expression {sval!r} at position {position}')
+        position = token.end()
+        operator = token.group('operator')
+        if operator is None:
+            if not expect_operand:
+                raise ValueError(f'Missing operator in {sval!r} at position {token.start()}')
+            number = token.group('number')
+            if number is not None:
+                if len(number) > EXPRESSION_MAX_DIGITS:
+                    raise ValueError(f'Too long number in {sval!r} at position {token.start()}')
+                program.append((False, Fraction(Decimal(number))))
+            else:
+                sign, unsigned, mdict = _match(token.group('duration') or token.group('clock'), granularity)
+                if mdict is None:
+                    raise ValueError(f'Invalid duration {unsigned!r} in {sval!r}')
+                program.append((True, _nanoseconds_from_match(sign, unsigned, mdict)))
+            expect_operand = False
+        elif operator == '(':
+            if not expect_operand:
+                raise ValueError(f'Missing operator in {sval!r} at position {token.start()}')
+            operators.append(operator)
+        elif operator == ')':
+            while operators and operators[-1] != '(':
+                program.append(operators.pop())
+            if expect_operand or not operators:
+                raise ValueError(f'Unexpected ")" in {sval!r} at position {token.start()}')
+            operators.pop()
+        elif expect_operand:
+            if operator not in '+-':
+                raise ValueError(f'Missing operand in {sval!r} at position {token.start()}')
+            if operator == '-':
+                operators.append('neg')
+        else:
+            operator = '*' if operator in 'xX×' else operator
+            while operators and operators[-1] != '(' and \
+                    EXPRESSION_PRECEDENCES[operators[-1]] >= EXPRESSION_PRECEDENCES[operator]:
+                program.append(operators.pop())
+            operators.append(operator)
+            expect_operand = True
+    if expect_operand:
+        raise ValueError(f'Missing operand at the end of {sval!r}')
+    while operators:
+        operator = operators.pop()
+        if operator == '(':
+            raise ValueError(f'Unclosed "(" in {sval!r}')
+        program.append(operator)
+    return tuple(program)
+
+
+def _evaluate_expression(program: tuple) -> int:
+    # Durations are integer nanoseconds rounded half up after every product
+    # or quotient, so values never become long fractions.
+    stack: typing.List[typing.Tuple[bool, typing.Any]] = []
+    for item in program:
+        if item.__class__ is tuple:
+            stack.append(item)
+            continue
+        is_duration, value = stack.pop()
+        if item == 'neg':
+            value = -value
+        else:
+            left_is_duration, left = stack.pop()
+            if item in '+-':
+                if left_is_duration != is_duration:
+                    raise ValueError('Cannot add or subtract duration and number')
+                value = left + value if item == '+' else left - value
             else:
-                return new_value
+                if is_duration and (left_is_duration or item == '/'):
+                    raise ValueError('Durations can only be multiplied or divided by numbers')
+                value = left * value if item == '*' else Fraction(left) / value
+                is_duration = left_is_duration or is_duration
+                if is_duration:
+                    value = (2 * value.numerator + value.denominator) // (2 * value.denominator)
+        if abs(value.numerator) > EXPRESSION_MAX_VALUE or value.denominator > EXPRESSION_MAX_VALUE:
+            raise ValueError('Too large value in expression')
+        stack.append((is_duration, value))
+
+    is_duration, value = stack.pop()
+    if is_duration:
         return value
+    # Plain number is seconds, like in `parse`.
+    value *= NANOSECONDS_PER_SECOND
+    return (2 * value.numerator + value.denominator) // (2 * value.denominator)
+
+
+def parse_expression(
+        sval: str,
+        granularity: str = 'seconds',
+        raise_exception: bool = False,
+        as_timedelta: bool = False,
+        as_nanoseconds: bool = False,
+) -> typing.Union[int, float, timedelta, None]:
+    """
+    Evaluate arithmetic expression of durations and numbers like
+    ``2h - 15m`` or ``3 * 45s``.  Durations could be added and subtracted,
+    multiplied (by ``*``, ``x`` or ``×``) and divided by numbers, parentheses
+    group terms.  Every term is any expression accepted by `parse` and plain
+    numbers alone mean seconds.  Evaluation uses integer nanoseconds, so the
+    result is exact up to nanosecond.  Result is converted like in `parse`
+    and ``None`` is returned for invalid expression.
+
+    Expressions are tokenized and evaluated in linear time without
+    recursion, so they are safe for untrusted input.  Expressions with
+    intermediate values (or denominators) beyond ``2 ** 128`` are invalid.  Compiled expressions
+    are cached, so repeated ones are only evaluated.
+
+    >>> parse_expression('2h - 15m'), parse_expression('3 x 45s')
+    (6300, 135)
+    >>> parse_expression('(1h 30m + 20:00) / 4', as_nanoseconds=True)
+    1650000000000
+    >>> parse_expression('1h * 1h')
+    """
+    try:
+        key = (sval, granularity)
+        program = EXPRESSION_PROGRAMS.get(key)
+        if program is None:
+            program = _compile_expression(sval, granularity)
+            if len(EXPRESSION_PROGRAMS) >= EXPRESSION_PROGRAMS_MAXSIZE:
+                EXPRESSION_PROGRAMS.pop(next(iter(EXPRESSION_PROGRAMS)), None)
+            EXPRESSION_PROGRAMS[key] = program
+        nanoseconds = _evaluate_expression(program)
+
+        if as_nanoseconds:
+            return nanoseconds
+        if as_timedelta and HAS_RELITIVE_TIMEDELTA:
+            return _intern(_make_relativedelta(-1 if nanoseconds < 0 else 1, 0, abs(nanoseconds)))
+        if as_timedelta:
+            return _intern(_timedelta_from_nanoseconds(nanoseconds))
+        return _seconds_from_nanoseconds(nanoseconds)
+    except Exception:
+        if raise_exception:
+            raise
+        return None
+
+
+class IncrementalParser:
+    """
+    Parser of time expression typed character by character, for validation
+    and autocompletion as you type.  Scanner state is kept between calls of
+    `feed`, so every appended character costs constant time.
+
+    ``state`` is ``complete`` if the text is time expression, ``prefix`` if
+    it could become one with more characters and ``dead`` otherwise.
+    `completions` returns aliases of units which could follow the text.
+    Units, clocks and plain numbers are supported like in `parse`, but not
+    ISO 8601 or dialects.
+
+    >>> parser = IncrementalParser()
+    >>> parser.feed('1h 3'), parser.completions()[:4]
+    ('prefix', ('m', 'min', 'mins', 'minute'))
+    >>> parser.feed('0m'), parse(parser.text)
+    ('complete', 5400)
+    >>> parser.completions()[:6]
+    ('min', 'mins', 'minute', 'minutes', 'ms', 'msec')
+    >>> parser.feed('x')
+    'dead'
+    """
+    __slots__ = (
+        'granularity', '_chars', '_mode', '_digits', '_dot', '_token',
+        '_first', '_last', '_clock_first', '_colons',
+    )
+
+    def __init__(self, granularity: str = 'seconds'):
+        self.granularity = granularity
+        self._chars: typing.List[str] = []
+        self._mode = 'start'
+        self._digits = 0  # digits in current number, clock group or exponent
+        self._dot = False  # current number has decimal point or clock has fraction
+        self._token = ''  # typed part of unit
+        self._first = -1  # index of the first and the last units
+        self._last = -1
+        self._clock_first = 0  # number of digits before the first colon
+        self._colons = 0
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._chars)
+
+    @property
+    def state(self) -> str:
+        mode = self._mode
+        if mode == 'dead':
+            return 'dead'
+        if mode in ('number', 'number_space'):
+            complete = bool(self._digits) and self._last < 0
+        elif mode == 'unit':
+            complete = UNIT_INDEXES.get(self._token, -1) > self._last
+        elif mode == 'clock':
+            complete = self._clock_complete()
+        elif mode == 'exponent':
+            complete = bool(self._digits)
+        else:
+            complete = mode in ('unit_space', 'separator', 'trailing')
+        return 'complete' if complete else 'prefix'
+
+    def completions(self) -> typing.Tuple[str, ...]:
+        if self._mode == 'unit':
+            token = self._token
+        elif self._mode in ('number', 'number_space') and self._digits:
+            token = ''
+        else:
+            return ()
+        return tuple(
+            alias
+            for aliases in tuple(UNIT_ALIASES.values())[self._last + 1:]
+            for alias in aliases
+            if alias.casefold().startswith(token) and alias.casefold() != token
+        )
+
+    def feed(self, chars: str) -> str:
+        for char in chars:
+            self._chars.append(char)
+            if self._mode != 'dead':
+                self._mode = self._step(char)
+        return self.state
+
+    def _clock_complete(self) -> bool:
+        if self._digits < (1 if self._dot else 2):
+            return False
+        if self._colons > 1:
+            return True
+        if not self._clock_first:
+            return self._dot or self.granularity != 'minutes'
+        return self._clock_first <= 2 and self._last < 0
+
+    def _number(self, char: str) -> str:
+        self._digits, self._dot = int(char != '.'), char == '.'
+        return 'number'
+
+    def _step(self, char: str) -> str:
+        mode = self._mode
+        if mode == 'unit':
+            token = self._token + char.casefold()
+            if UNIT_PREFIXES.get(token, -1) > self._last:
+                self._token = token
+                return mode
+            index = UNIT_INDEXES.get(self._token, -1)
+            if index <= self._last:
+                return 'dead'
+            if self._first < 0:
+                self._first = index
+            self._last, mode = index, 'unit_space'
+        if char.isspace():
+            if mode in ('start', 'signed', 'unit_space', 'separator', 'number_space', 'trailing'):
+                return mode
+            if mode == 'number':
+                return 'number_space'
+            if (mode == 'clock' and self._clock_complete()) or (mode == 'exponent' and self._digits):
+                return 'trailing'
+            return 'dead'
+
+        if mode in ('start', 'signed', 'unit_space', 'separator'):
+            if char.isdigit() or char == '.':
+                return self._number(char)
+            if mode == 'start' and char in ('+', '-'):
+                return 'signed'
+            if mode == 'unit_space' and char in (',', '/') and self._last <= 5:
+                return 'separator'
+            if mode != 'unit_space' and mode != 'separator' and char == ':':
+                self._clock_first, self._colons, self._digits, self._dot = 0, 1, 0, False
+                return 'clock'
+            return 'dead'
+
+        if mode == 'number':
+            if char.isdigit():
+                self._digits += 1
+                return mode
+            if char == '.' and not self._dot:
+                self._dot = True
+                return mode
+            if char == ':' and self._digits and not self._dot and (
+                    self._last < 0 or (self._first >= 2 and self._last <= 3)
+            ):
+                self._clock_first, self._colons, self._digits = self._digits, 1, 0
+                return 'clock'
+            if char in ('e', 'E') and self._digits and self._last < 0:
+                self._digits = 0
+                return 'exponent_start'
+        if mode in ('number', 'number_space') and self._digits:
+            token = char.casefold()
+            if UNIT_PREFIXES.get(token, -1) > self._last:
+                self._token = token
+                return 'unit'
+            return 'dead'
+
+        if mode == 'clock':
+            if char.isdigit() and (self._dot or self._digits < 2):
+                self._digits += 1
+                return mode
+            if self._digits != 2 or self._dot:
+                return 'dead'
+            if char == ':' and self._clock_first and self._colons < (3 if self._last < 0 else 2):
+                self._colons, self._digits = self._colons + 1, 0
+                return mode
+            if char == '.' and (self._colons > 1 or (self._clock_first <= 2 and self._last < 0)):
+                self._dot, self._digits = True, 0
+                return mode
+            return 'dead'
+
+        if mode in ('exponent_start', 'exponent_sign', 'exponent'):
+            if char.isdigit():
+                self._digits += 1
+                return 'exponent'
+            if mode == 'exponent_start' and char in ('+', '-'):
+                return 'exponent_sign'
+        return 'dead'
+
+
+def parse_into(
+        svals: typing.Iterable[typing.Union[str, int, float]],
+        out: typing.Any,
+        granularity: str = 'seconds',
+        valid: typing.Any = None,
+        dialect: typing.Optional[str] = None,
+) -> int:
+    """
+    Parse time expressions from ``svals`` into preallocated buffer ``out``.
+    The buffer could be ``array``, numpy array or any other writable buffer.
+    Buffers of signed 64-bit integers (``array('q')``, ``numpy.int64``) get
+    number of nanoseconds, floating point buffers (``array('d')``,
+    ``array('f')``) get number of seconds.  Unparsed values are written as
+    ``0`` for integer buffers and ``nan`` for floating point ones.
+
+    If writable buffer ``valid`` is passed, then it is filled as validity
+    bitmap: one bit per item in least-significant bit order (as in Apache
+    Arrow), set for parsed values and cleared for failed ones.
+
+    Values from ``svals`` are consumed only while there is a room in buffer,
+    so one iterator could be passed through several reused buffers.  Returns
+    the number of written items.
+
+    >>> from array import array
+    >>> out, valid = array('q', bytes(8 * 3)), bytearray(1)
+    >>> parse_into(['1h', '1.5 us', 'ten'], out, valid=valid)
+    3
+    >>> out.tolist(), bin(valid[0])
+    ([3600000000000, 1500, 0], '0b11')
+    >>> out = array('d', bytes(8 * 2))
+    >>> parse_into(['1h', '1.5 us'], out)
+    2
+    >>> out.tolist()
+    [3600.0, 1.5e-06]
+    """
+    _check_dialect(dialect)
+    view: typing.Any = memoryview(out)
+    if view.format in ('q', 'l') and view.itemsize == 8:
+        view, is_float = view.cast('B').cast('q'), False
+    elif view.format in ('d', 'f'):
+        view, is_float = view.cast('B').cast(view.format), True
+    else:
+        raise TypeError(f'Unsupported buffer format {view.format!r}, int64 or floating point buffer required.')
+
+    bitmap = None
+    if valid is not None:
+        bitmap = memoryview(valid).cast('B')
+        if len(bitmap) * 8 < len(view):
+            raise ValueError('Validity bitmap is too small for the output buffer.')
+
+    index = -1
+    for index, sval in zip(range(len(view)), svals):
+        try:
+            value = _parse_nanoseconds(sval, granularity, dialect)
+            seconds = value / NANOSECONDS_PER_SECOND if is_float else NAN
+            parsed = is_float or INT64_MIN <= value <= INT64_MAX
+        except Exception:
+            parsed = False
+
+        if is_float:
+            view[index] = seconds if parsed else NAN
+            if parsed and math.isinf(view[index]):
+                # Out of ``float32`` range, as ``float64`` overflow above.
+                view[index], parsed = NAN, False
+        else:
+            view[index] = value if parsed else 0
+
+        if bitmap is not None:
+            if parsed:
+                bitmap[index >> 3] |= 1 << (index & 7)
+            else:
+                bitmap[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+    return index + 1
+
+
+def _fold(
+        svals: typing.Iterable[typing.Union[str, int, float]],
+        granularity: str,
+        dialect: typing.Optional[str],
+        raise_exception: bool,
+) -> typing.Iterator[typing.Optional[typing.Tuple[int, int, int]]]:
+    # Every value is reduced to integer years, months and nanoseconds, so
+    # callers sum them without building ``timedelta`` objects.  Integral years
+    # and months are counted separately for calendar aware results.
+    _check_dialect(dialect)
+    for sval in svals:
+        try:
+            if isinstance(sval, (int, float)):
+                yield 0, 0, round(sval * 10 ** 9)
+                continue
+            sign, unsigned, mdict = _match(sval, granularity, dialect)
+            if mdict is None:
+                yield 0, 0, _nanoseconds_from_match(sign, unsigned, None)
+                continue
+            years, months, nanoseconds = 0, 0, 0
+            for key, value in mdict.items():
+                if not value:
+                    continue
+                count = _calendar_count(value) if key in ('years', 'months') else None
+                if count is None:
+                    nanoseconds += _decimal_to_nanoseconds(value, NANOSECOND_MULTIPLIERS[key])
+                elif key == 'years':
+                    years += count
+                else:
+                    months += count
+        except Exception:
+            if raise_exception:
+                raise
+            yield None
+        else:
+            yield sign * years, sign * months, sign * nanoseconds
+
+
+def _folded_nanoseconds(years: int, months: int, nanoseconds: int) -> int:
+    return years * NANOSECOND_MULTIPLIERS['years'] + months * NANOSECOND_MULTIPLIERS['months'] + nanoseconds
+
+
+def _seconds_from_nanoseconds(nanoseconds: int) -> typing.Union[int, float]:
+    seconds, remainder = divmod(nanoseconds, 10 ** 9)
+    return seconds if not remainder else nanoseconds / NANOSECONDS_PER_SECOND
+
+
+def parse_sum(
+        svals: typing.Iterable[typing.Union[str, int, float]],
+        granularity: str = 'seconds',
+        raise_exception: bool = False,
+        as_timedelta: bool = False,
+        as_nanoseconds: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> typing.Union[int, float, timedelta]:
+    """
+    Sum time expressions from ``svals`` without building result for every
+    value: they are folded into integer counters of years, months and
+    nanoseconds, so the sum is exact and memory usage is constant.  Arguments
+    are the same as for `parse`, unparsed values are skipped (or raise, if
+    ``raise_exception`` is ``True``).  With ``as_timedelta=True`` years and
+    months are kept as calendar months of ``relativedelta`` (if installed).
+
+    >>> parse_sum(['1h30m', '45 min', 'ten'])
+    8100
+    >>> parse_sum(['1y', '1mo', '-1d'], as_timedelta=True)
+    relativedelta(years=+1, months=+1, days=-1)
+    """
+    total_years, total_months, total_nanoseconds = 0, 0, 0
+    for folded in _fold(svals, granularity, dialect, raise_exception):
+        if folded is not None:
+            total_years += folded[0]
+            total_months += folded[1]
+            total_nanoseconds += folded[2]
+
+    if as_timedelta and HAS_RELITIVE_TIMEDELTA:
+        months = total_years * 12 + total_months
+        delta = _make_relativedelta(-1 if total_nanoseconds < 0 else 1, 0, abs(total_nanoseconds))
+        return _intern(delta + relativedelta(months=months) if months else delta)  # type: ignore
+    nanoseconds = _folded_nanoseconds(total_years, total_months, total_nanoseconds)
+    if as_nanoseconds:
+        return nanoseconds
+    if as_timedelta:
+        return _intern(_timedelta_from_nanoseconds(nanoseconds))  # type: ignore
+    return _seconds_from_nanoseconds(nanoseconds)
+
+
+def parse_stats(
+        svals: typing.Iterable[typing.Union[str, int, float]],
+        granularity: str = 'seconds',
+        as_nanoseconds: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> DurationStats:
+    """
+    Count, sum, minimum, maximum and mean of time expressions from ``svals``
+    and the number of unparsed ones, computed in one pass in constant memory
+    from integer nanoseconds (like `parse_sum`).
+
+    >>> parse_stats(['1h30m', '45 min', 'ten'])
+    DurationStats(count=2, failures=1, total=8100, min=2700, max=5400, mean=4050)
+    """
+    count, failures, total = 0, 0, 0
+    minimum: typing.Optional[int] = None
+    maximum: typing.Optional[int] = None
+    for folded in _fold(svals, granularity, dialect, False):
+        if folded is None:
+            failures += 1
+            continue
+        nanoseconds = _folded_nanoseconds(*folded)
+        count += 1
+        total += nanoseconds
+        if minimum is None or nanoseconds < minimum:
+            minimum = nanoseconds
+        if maximum is None or nanoseconds > maximum:
+            maximum = nanoseconds
+
+    if not count:
+        return DurationStats(0, failures, 0, None, None, None)
+    if as_nanoseconds:
+        # Mean is rounded half up with integer arithmetic.
+        return DurationStats(count, failures, total, minimum, maximum, (2 * total + count) // (2 * count))
+    return DurationStats(
+        count,
+        failures,
+        _seconds_from_nanoseconds(total),
+        _seconds_from_nanoseconds(minimum),  # type: ignore
+        _seconds_from_nanoseconds(maximum),  # type: ignore
+        total / (count * NANOSECONDS_PER_SECOND) if total % count else _seconds_from_nanoseconds(total // count),
+    )
+
+
+def iparse(
+        svals: typing.Iterable[typing.Union[str, int, float]],
+        chunk: int = 1024,
+        granularity: str = 'seconds',
+        raise_exception: bool = False,
+        as_timedelta: bool = False,
+        as_nanoseconds: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> typing.Iterator[typing.Union[int, float, timedelta, None]]:
+    """
+    Lazily parse time expressions from ``svals`` like `parse` does, yielding
+    results in the same order.  Values are pulled from the iterable in chunks
+    of ``chunk`` items only when the previous chunk was consumed, so at most
+    one chunk is kept in memory and slow consumers are not overrun.  Repeated
+    strings within a chunk are parsed once.
+
+    >>> list(iparse(['1h', '90', '1h', 'ten'], chunk=2))
+    [3600, 90, 3600, None]
+    >>> from itertools import islice, repeat
+    >>> list(islice(iparse(repeat('1m')), 3))
+    [60, 60, 60]
+    """
+    if chunk < 1:
+        raise ValueError(f'Chunk size should be positive, got {chunk}.')
+    iterator = iter(svals)
+    while True:
+        values = list(itertools.islice(iterator, chunk))
+        if not values:
+            return
+        results: typing.Dict[str, typing.Any] = {}
+        for sval in values:
+            if not isinstance(sval, str):
+                yield parse(sval, granularity, raise_exception, as_timedelta, as_nanoseconds, dialect)
+                continue
+            if sval not in results:
+                results[sval] = parse(sval, granularity, raise_exception, as_timedelta, as_nanoseconds, dialect)
+            yield results[sval]
+
+
+def _calendar_offset(
+        sval: typing.Union[str, int, float],
+        granularity: str,
+        dialect: typing.Optional[str],
+) -> typing.Tuple[int, timedelta]:
+    # Expression is reduced to calendar months and fixed offset rounded to
+    # microseconds, as ``relativedelta`` from `parse` would be.
+    if isinstance(sval, (int, float)):
+        return 0, _timedelta_from_nanoseconds(round(sval * 10 ** 9))
+    sign, unsigned, mdict = _match(sval, granularity, dialect)
+    if mdict is None:
+        months, nanoseconds = 0, abs(_nanoseconds_from_match(1, unsigned, None))
+    else:
+        months, nanoseconds = _calendar_from_match(mdict)
+    return sign * months, sign * timedelta(microseconds=(nanoseconds + 500) // 1000)
+
+
+def _shift_months(anchor: date, months: int) -> date:
+    # Months are added with day clipped to the month length, like in
+    # ``relativedelta``, from the table instead of ``calendar.monthrange``.
+    year, month = divmod(anchor.year * 12 + anchor.month - 1 + months, 12)
+    day = anchor.day
+    if day > 28:
+        day = min(day, MONTH_DAYS[month] + (month == 1 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)))
+    return anchor.replace(year=year, month=month + 1, day=day)
+
+
+def parse_at(
+        sval: typing.Union[str, int, float],
+        anchor: date,
+        granularity: str = 'seconds',
+        raise_exception: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> typing.Optional[date]:
+    """
+    Resolve time expression against ``anchor`` datetime (or date): integral
+    years and months are calendar ones, with day clipped to the end of
+    shorter month, other units are fixed.  The result is the same as adding
+    ``relativedelta`` from ``parse(sval, as_timedelta=True)``, but without
+    ``dateutil``.  Returns ``None`` if expression cannot be parsed or the
+    result is out of range.
+
+    >>> from datetime import datetime
+    >>> parse_at('1 month', datetime(2024, 1, 31))
+    datetime.datetime(2024, 2, 29, 0, 0)
+    >>> parse_at('1y 2h', datetime(2023, 3, 1))
+    datetime.datetime(2024, 3, 1, 2, 0)
+    """
+    _check_dialect(dialect)
+    try:
+        months, offset = _calendar_offset(sval, granularity, dialect)
+        if months:
+            anchor = _shift_months(anchor, months)
+        if offset % timedelta(days=1) and not isinstance(anchor, datetime):
+            anchor = datetime(anchor.year, anchor.month, anchor.day)
+        return anchor + offset
     except Exception:
         if raise_exception:
             raise
         return None
+
+
+def parse_at_many(
+        sval: typing.Union[str, int, float],
+        anchors: typing.Iterable[date],
+        granularity: str = 'seconds',
+        raise_exception: bool = False,
+        dialect: typing.Optional[str] = None,
+) -> typing.List[typing.Optional[date]]:
+    """
+    Resolve one time expression against every datetime of ``anchors`` like
+    `parse_at`.  Expression is parsed once, so each anchor costs only month
+    arithmetic and one addition.  Items are ``None`` for anchors which could
+    not be shifted (or all of them if expression cannot be parsed).
+
+    >>> from datetime import date
+    >>> parse_at_many('1mo', [date(2023, 1, 31), date(2024, 1, 31), date(9999, 12, 1)])
+    [datetime.date(2023, 2, 28), datetime.date(2024, 2, 29), None]
+    """
+    _check_dialect(dialect)
+    try:
+        months, offset = _calendar_offset(sval, granularity, dialect)
+    except Exception:
+        if raise_exception:
+            raise
+        return [None for _ in anchors]
+    partial_days = bool(offset % timedelta(days=1))
+    results: typing.List[typing.Optional[date]] = []
+    for anchor in anchors:
+        try:
+            if months:
+                anchor = _shift_months(anchor, months)
+            if partial_days and not isinstance(anchor, datetime):
+                anchor = datetime(anchor.year, anchor.month, anchor.day)
+            results.append(anchor + offset)
+        except Exception:
+            if raise_exception:
+                raise
+            results.append(None)
+    return results
+
+
+def _arrow_strings(strings: typing.Any) -> typing.Iterator[str]:
+    import pyarrow  # type: ignore
+
+    _, offsets_buffer, data_buffer = strings.buffers()
+    if pyarrow.types.is_large_string(strings.type):
+        offsets = memoryview(offsets_buffer).cast('q')
+    else:
+        offsets = memoryview(offsets_buffer).cast('i')
+    offsets = offsets[strings.offset:strings.offset + len(strings) + 1]
+    data = memoryview(data_buffer) if data_buffer is not None else memoryview(b'')
+    for index in range(len(strings)):
+        yield str(data[offsets[index]:offsets[index + 1]], 'utf-8')
+
+
+def parse_arrow(
+        values: typing.Any,
+        granularity: str = 'seconds',
+        dialect: typing.Optional[str] = None,
+) -> typing.Any:
+    """
+    Parse ``pyarrow`` column of time expressions into ``duration[ns]`` array.
+    Accepts ``StringArray``, ``LargeStringArray``, dictionary-encoded arrays
+    of them and ``ChunkedArray`` (converted chunk by chunk).  Every distinct
+    string is parsed only once: plain arrays are dictionary-encoded first and
+    dictionary entries are read straight from Arrow offsets/data buffers.
+    Nulls and unparsed values become nulls.  Requires ``pyarrow`` installed.
+    """
+    import pyarrow  # type: ignore
+
+    duration_type = pyarrow.duration('ns')
+    if isinstance(values, pyarrow.ChunkedArray):
+        return pyarrow.chunked_array(
+            [parse_arrow(chunk, granularity, dialect) for chunk in values.chunks],
+            type=duration_type,
+        )
+
+    if not pyarrow.types.is_dictionary(values.type):
+        values = values.dictionary_encode()
+    strings = values.dictionary
+    if not (pyarrow.types.is_string(strings.type) or pyarrow.types.is_large_string(strings.type)):
+        raise TypeError(f'Unsupported arrow type {values.type}, string array required.')
+
+    out, valid = array('q', bytes(8 * len(strings))), bytearray((len(strings) + 7) // 8)
+    parse_into(_arrow_strings(strings), out, granularity, valid=valid, dialect=dialect)
+    durations = pyarrow.Array.from_buffers(
+        duration_type,
+        len(strings),
+        [pyarrow.py_buffer(valid), pyarrow.py_buffer(out)],
+    )
+    return durations.take(values.indices)
+
+
+class DurationColumn:
+    """
+    Column of time expressions stored as distinct strings and compact
+    ``array('I')`` of their codes (4 bytes per row).  Every distinct string is
+    parsed once to integer nanoseconds, so columns with few distinct values
+    take orders of magnitude less memory than lists of numbers or timedeltas.
+
+    Items are exact values in seconds computed from nanoseconds (as in
+    `parse_sum`), so unlike `parse` they are not rounded to microseconds.
+    Slices are views sharing codes and parsed values, nothing is copied.
+    `seconds`, `nanoseconds` and `timedelta64` convert the whole column at
+    once; unparsed values (and values out of int64 nanoseconds for the latter
+    two) become ``nan``, ``INT64_MIN`` and ``NaT``.
+
+    >>> column = DurationColumn(['1h', '90s', '1h', 'ten'])
+    >>> column.strings, column.codes.tolist()
+    (('1h', '90s', 'ten'), [0, 1, 0, 2])
+    >>> column[1:].seconds().tolist()
+    [90.0, 3600.0, nan]
+    >>> list(column[::2]), column.nanoseconds()[1]
+    ([3600, 3600], 90000000000)
+    """
+    __slots__ = ('strings', 'codes', '_values', '_nanoseconds')
+
+    def __init__(
+            self,
+            svals: typing.Iterable[str] = (),
+            granularity: str = 'seconds',
+            dialect: typing.Optional[str] = None,
+    ):
+        index: typing.Dict[str, int] = {}
+        codes = array('I', (index.setdefault(sval, len(index)) for sval in svals))
+        self.strings = tuple(index)
+        self.codes = memoryview(codes)
+        self._nanoseconds: typing.Tuple[typing.Optional[int], ...] = tuple(
+            parse(sval, granularity, as_nanoseconds=True, dialect=dialect) for sval in index  # type: ignore
+        )
+        self._values = tuple(
+            None if value is None else _seconds_from_nanoseconds(value) for value in self._nanoseconds
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return map(self._values.__getitem__, self.codes)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self._values[self.codes[item]]
+        column = object.__new__(DurationColumn)
+        column.strings, column._values, column._nanoseconds = self.strings, self._values, self._nanoseconds
+        column.codes = self.codes[item]
+        return column
+
+    def __repr__(self):
+        return f'<DurationColumn of {len(self)} values, {len(self.strings)} distinct>'
+
+    def _int64_table(self) -> typing.List[int]:
+        return [
+            value if value is not None and INT64_MIN <= value <= INT64_MAX else INT64_MIN
+            for value in self._nanoseconds
+        ]
+
+    def seconds(self) -> array:
+        table = [NAN if value is None else value for value in self._values]
+        return array('d', map(table.__getitem__, self.codes))
+
+    def nanoseconds(self) -> array:
+        return array('q', map(self._int64_table().__getitem__, self.codes))
+
+    def timedelta64(self) -> typing.Any:
+        """
+        Values as numpy ``timedelta64[ns]`` array.  Requires ``numpy`` installed.
+        """
+        import numpy  # type: ignore
+
+        table = numpy.array(self._int64_table(), dtype=numpy.int64).view('m8[ns]')
+        return table[numpy.asarray(self.codes)]
+
+
+class Profile:
+    """
+    Time spent in stages of parsing, collected by `profile`.  ``stats`` maps
+    stage name to ``[calls, seconds]``; ``total`` stage is the whole parsing
+    of values by `parse`, `parse_into` and other functions built on it.
+    """
+    __slots__ = ('stats',)
+
+    def __init__(self) -> None:
+        self.stats: typing.Dict[str, typing.List[typing.Any]] = {}
+
+    def add(self, stage: str, seconds: float):
+        stat = self.stats.get(stage)
+        if stat is None:
+            self.stats[stage] = [1, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+
+    def report(self) -> str:
+        total = self.stats.get('total', (0, 0.0))[1]
+        lines = [f'{"stage":<28} {"calls":>10} {"total, s":>12} {"per call, us":>14} {"share":>7}']
+        for stage, (calls, seconds) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            share = f'{seconds / total:.1%}' if total else '-'
+            lines.append(f'{stage:<28} {calls:>10} {seconds:>12.6f} {seconds / calls * 1e6:>14.3f} {share:>7}')
+        return '\n'.join(lines) + '\n'
+
+
+class _ProfiledPattern:
+    __slots__ = ('pattern', 'stage', 'profile')
+
+    def __init__(self, pattern: typing.Pattern, stage: str, profile: Profile):
+        self.pattern, self.stage, self.profile = pattern, stage, profile
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+    def match(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.pattern.match(*args)
+        finally:
+            self.profile.add(self.stage, time.perf_counter() - start)
+
+
+def _profiled(func: typing.Callable, stage: str, profile: Profile) -> typing.Callable:
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            profile.add(stage, time.perf_counter() - start)
+    return wrapper
+
+
+@contextmanager
+def profile(output: typing.Optional[typing.TextIO] = None) -> typing.Iterator[Profile]:
+    """
+    Collect time spent in every stage of parsing inside ``with`` block:
+    normalization, sign extraction, bare number shortcut, every attempt of
+    compiled formats (including case-insensitive ones for non-ASCII input),
+    building of result and its conversion.  Yields `Profile` with aggregated
+    ``stats``; its `report` is written to ``output`` on exit, if passed.
+
+    Stages are timed by replacing module globals with instrumented versions,
+    so there is no overhead outside of the block, but it affects all threads.
+
+    >>> with profile() as stats:
+    ...     _ = [parse('1h 30m'), parse('10'), parse('4:13:02')]
+    >>> stats.stats['total'][0], stats.stats['number'][0], stats.stats['timeformats[3]'][0]
+    (3, 3, 1)
+    """
+    result = Profile()
+    module = globals()
+    replacements = {
+        'COMPILED_SIGN': _ProfiledPattern(COMPILED_SIGN, 'sign', result),
+        'COMPILED_TIMEFORMATS': [
+            _ProfiledPattern(pattern, f'timeformats[{index}]', result)
+            for index, pattern in enumerate(COMPILED_TIMEFORMATS)
+        ],
+        'COMPILED_MINUTES_TIMEFORMATS': [
+            _ProfiledPattern(pattern, f'minutes timeformats[{index}]', result)
+            for index, pattern in enumerate(COMPILED_MINUTES_TIMEFORMATS)
+        ],
+        'COMPILED_UNICODE_TIMEFORMATS': [
+            _ProfiledPattern(pattern, f'unicode timeformats[{index}]', result)
+            for index, pattern in enumerate(COMPILED_UNICODE_TIMEFORMATS)
+        ],
+        'COMPILED_UNICODE_MINUTES_TIMEFORMATS': [
+            _ProfiledPattern(pattern, f'unicode minutes timeformats[{index}]', result)
+            for index, pattern in enumerate(COMPILED_UNICODE_MINUTES_TIMEFORMATS)
+        ],
+        '_normalize': _profiled(_normalize, 'normalization', result),
+        '_split_sign': _profiled(_split_sign, 'sign', result),
+        '_match_iso8601': _profiled(_match_iso8601, 'iso8601', result),
+        '_match_dialect': _profiled(_match_dialect, 'dialect', result),
+        '_all_digits': _profiled(_all_digits, 'all_digits', result),
+        '_relativedelta_from_match': _profiled(_relativedelta_from_match, 'relativedelta', result),
+        '_nanoseconds_from_match': _profiled(_nanoseconds_from_match, 'nanoseconds', result),
+        '_total_seconds': _profiled(_total_seconds, 'conversion', result),
+        '_intern': _profiled(_intern, 'conversion', result),
+        '_is_number': _profiled(_is_number, 'number', result),
+        '_parse': _profiled(_parse, 'total', result),
+        '_parse_nanoseconds': _profiled(_parse_nanoseconds, 'total', result),
+    }
+    saved = {name: module[name] for name in replacements}
+    module.update(replacements)
+    try:
+        yield result
+    finally:
+        module.update(saved)
+        if output is not None:
+            output.write(result.report())
+
+
+def format_iso8601(nanoseconds: int) -> str:
+    """
+    Format number of nanoseconds as ISO 8601 duration.
+
+    >>> format_iso8601(parse('1d 1h 30m 1.5s', as_nanoseconds=True))
+    'P1DT1H30M1.5S'
+    >>> format_iso8601(-90 * 10 ** 9), format_iso8601(0)
+    ('-PT1M30S', 'PT0S')
+    """
+    sign = '-' if nanoseconds < 0 else ''
+    seconds, fraction = divmod(abs(nanoseconds), 10 ** 9)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+
+    date = f'{days}D' if days else ''
+    time = ''.join(f'{value}{unit}' for value, unit in ((hours, 'H'), (minutes, 'M')) if value)
+    if fraction:
+        time += f'{seconds}.{fraction:09d}'.rstrip('0') + 'S'
+    elif seconds or not (date or time):
+        time += f'{seconds}S'
+    return f'{sign}P{date}T{time}' if time else f'{sign}P{date}'
+
+
+def _format_lines(
+        lines: typing.List[bytes],
+        granularity: str,
+        output_format: str,
+        dialect: typing.Optional[str] = None,
+) -> typing.List[typing.Optional[bytes]]:
+    results: typing.Dict[bytes, typing.Optional[bytes]] = {}
+    for line in lines:
+        if line in results:
+            continue
+        value = parse(
+            line.decode('utf-8', 'replace').strip(),
+            granularity,
+            as_nanoseconds=output_format != 'seconds',
+            dialect=dialect,
+        )
+        if value is None:
+            results[line] = None
+        elif output_format == 'iso':
+            results[line] = format_iso8601(value).encode() + b'\n'  # type: ignore
+        else:
+            results[line] = str(value).encode() + b'\n'
+    return [results[line] for line in lines]
+
+
+def _read_batches(stream: typing.BinaryIO, size: int) -> typing.Iterator[typing.List[bytes]]:
+    while True:
+        lines = stream.readlines(size)
+        if not lines:
+            return
+        yield lines
+
+
+def main(args: typing.Optional[typing.Sequence[str]] = None) -> int:
+    """
+    Command line interface: ``python -m pytimeparse2`` or ``timeparse``.
+    Reads time expressions from stdin (one per line) and writes parsed values
+    to stdout.  Lines are read and parsed in batches, repeated lines in batch
+    are parsed once.  Unparsed lines are written as empty lines, or, with
+    ``--strict``, stop processing with error.
+    """
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog='timeparse', description='Parse time expressions from stdin.')
+    parser.add_argument(
+        '-f', '--format', choices=('seconds', 'nanoseconds', 'iso'), default='seconds',
+        help='output format (default: %(default)s)',
+    )
+    parser.add_argument(
+        '-g', '--granularity', choices=('seconds', 'minutes'), default='seconds',
+        help='minimal type of digits after last colon (default: %(default)s)',
+    )
+    parser.add_argument(
+        '-d', '--dialect', choices=('go', 'prometheus'), default=None,
+        help='parse only strict Go or Prometheus duration syntax',
+    )
+    parser.add_argument('-s', '--strict', action='store_true', help='fail on the first unparsed line')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes (default: %(default)s)')
+    parser.add_argument(
+        '-b', '--batch-size', type=int, default=1 << 20,
+        help='approximate size of batch in bytes (default: %(default)s)',
+    )
+    options = parser.parse_args(args)
+
+    batches = _read_batches(sys.stdin.buffer, options.batch_size)
+    results: typing.Iterator[typing.List[typing.Optional[bytes]]]
+    if options.jobs > 1:
+        import functools
+        import multiprocessing
+
+        pool = multiprocessing.Pool(options.jobs)
+        formatter = functools.partial(
+            _format_lines,
+            granularity=options.granularity,
+            output_format=options.format,
+            dialect=options.dialect,
+        )
+        results = pool.imap(formatter, batches)
+    else:
+        pool = None
+        results = (_format_lines(lines, options.granularity, options.format, options.dialect) for lines in batches)
+
+    try:
+        output, line_number = sys.stdout.buffer, 0
+        for lines in results:
+            if options.strict and None in lines:
+                failed = lines.index(None)
+                output.write(b''.join(lines[:failed]))  # type: ignore
+                output.flush()
+                print(f'timeparse: could not parse line {line_number + failed + 1}', file=sys.stderr)
+                return 1
+            output.write(b''.join(line or b'\n' for line in lines))
+            line_number += len(lines)
+        output.flush()
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
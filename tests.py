@@ -9,13 +9,34 @@ Unit tests for the `parse` function.
 
 from __future__ import absolute_import
 
+import array
+import concurrent.futures
 import datetime
 import doctest
+import gc
+import io
+import itertools
+import math
+import os
 import re
+import sqlite3
+import tempfile
+import time
 import pytimeparse2 as timeparse
 import unittest
+from unittest import mock
 from dateutil.relativedelta import relativedelta
 
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
 
 class TestParsing(unittest.TestCase):
     """
@@ -229,6 +250,15 @@ class TestNumberOutput(unittest.TestCase):
         self.assertEqual(timeparse.parse('+0:02', granularity='seconds'), 2)
         self.assertEqual(timeparse.parse('-0:02', granularity='seconds'), -2)
 
+    def test_timeparse_granularity_5(self):
+        """Check that seconds clock with minute-level granularity is applied the same way in all functions."""
+        self.assertAlmostEqual(timeparse.parse(':02.5', granularity='minutes'), 2.5)
+        self.assertIsNone(timeparse.parse(':02', granularity='minutes'))
+        self.assertFalse(timeparse.is_duration(':02', granularity='minutes'))
+        self.assertEqual(timeparse.try_parse(':02', granularity='minutes').error.position, 0)
+        self.assertEqual(timeparse.parse('1d 4:32', granularity='minutes'), None)
+        self.assertEqual(timeparse.parse('1d 4:32:02', granularity='minutes'), 86400+272*60+2)
+
     def test_timeparse_unparsed(self):
         """Check that unparsed values tries to converts into int(). """
         self.assertEqual(timeparse.parse(100), 100)
@@ -738,6 +768,1171 @@ class TestRelativeDeltaOutput(unittest.TestCase):
     def test_combined(self):
         self.assertEqual(timeparse.parse('1y2mo3w4d5h6m7s8ms', as_timedelta=True), relativedelta(years=1, months=2, weeks=3, days=4, hours=5, minutes=6, seconds=7, microseconds=8000))
 
+    def test_sub_millisecond(self):
+        self.assertEqual(timeparse.parse('30 us', as_timedelta=True), relativedelta(microseconds=30))
+        self.assertEqual(timeparse.parse('1h 1.5us', as_timedelta=True), relativedelta(hours=1, microseconds=2))
+        self.assertEqual(timeparse.parse('-2500 ns', as_timedelta=True), -relativedelta(microseconds=3))
+
+    def test_calendar_units(self):
+        self.assertEqual(timeparse.parse('14 months', as_timedelta=True), relativedelta(years=1, months=2))
+        self.assertEqual(timeparse.parse('-14 months', as_timedelta=True), -relativedelta(years=1, months=2))
+        self.assertEqual(timeparse.parse('1.0 year', as_timedelta=True), relativedelta(years=1))
+        self.assertEqual(timeparse.parse('36 hours', as_timedelta=True), relativedelta(days=1, hours=12))
+        self.assertIsNone(timeparse.parse('1.5 years', as_timedelta=True))
+        self.assertIsNone(timeparse.parse('1.1.1 years', as_timedelta=True))
+
+
+
+class TestISO8601(unittest.TestCase):
+    """
+    Unit tests for ISO 8601 durations.
+    """
+
+    def test_number_output(self):
+        self.assertEqual(timeparse.parse('PT1H30M'), 5400)
+        self.assertEqual(timeparse.parse('P3DT4H'), 273600)
+        self.assertEqual(timeparse.parse('P1M'), 30 * 86400)
+        self.assertEqual(timeparse.parse('PT1M'), 60)
+        self.assertEqual(timeparse.parse('P2W'), 14 * 86400)
+        self.assertEqual(timeparse.parse('pt1h'), 3600)
+        self.assertEqual(timeparse.parse(' - PT0,5S '), -0.5)
+        self.assertEqual(timeparse.parse('P1Y2M3W4DT5H6M7.5S', as_nanoseconds=True), 38898367500000000)
+
+    def test_timedelta_output(self):
+        self.assertEqual(
+            timeparse.parse('P1Y2M3W4DT5H6M7.5S', as_timedelta=True),
+            relativedelta(years=1, months=2, weeks=3, days=4, hours=5, minutes=6, seconds=7, microseconds=500000),
+        )
+        self.assertEqual(timeparse.parse('-P1DT12H', as_timedelta=True), -relativedelta(days=1, hours=12))
+        self.assertIsNone(timeparse.parse('P1.5Y', as_timedelta=True))
+
+    def test_invalid(self):
+        for sval in ('P', 'PT', 'P1', 'P1DT', 'PT1H1D', 'P1Y2Y', 'P1H', 'P 1D', 'P-1D'):
+            self.assertIsNone(timeparse.parse(sval), sval)
+            self.assertFalse(timeparse.is_duration(sval), sval)
+
+
+class TestDialects(unittest.TestCase):
+    """
+    Unit tests for strict Go and Prometheus duration syntax.
+    """
+
+    def test_go(self):
+        self.assertEqual(timeparse.parse('1h30m0.5s', dialect='go'), 5400.5)
+        self.assertEqual(timeparse.parse('300ms', dialect='go'), 0.3)
+        self.assertEqual(timeparse.parse('1.5\u00b5s', dialect='go', as_nanoseconds=True), 1500)
+        self.assertEqual(timeparse.parse('1.5\u03bcs', dialect='go', as_nanoseconds=True), 1500)
+        self.assertEqual(timeparse.parse('2us3ns', dialect='go', as_nanoseconds=True), 2003)
+        self.assertEqual(timeparse.parse('-1m.5s', dialect='go'), -60.5)
+        self.assertEqual(timeparse.parse('+2.h', dialect='go'), 7200)
+        self.assertEqual(timeparse.parse('0', dialect='go'), 0)
+        self.assertEqual(timeparse.parse('-0', dialect='go', as_nanoseconds=True), 0)
+        self.assertEqual(timeparse.parse(90, dialect='go'), 90)
+        self.assertEqual(
+            timeparse.parse('1m30s', dialect='go', as_timedelta=True),
+            relativedelta(minutes=1, seconds=30),
+        )
+        self.assertEqual(
+            timeparse.parse('-1h1ms', dialect='go', as_timedelta=True),
+            -relativedelta(hours=1, microseconds=1000),
+        )
+
+    def test_go_repeated_units(self):
+        self.assertEqual(timeparse.parse('1h1h', dialect='go'), 7200)
+        self.assertEqual(timeparse.parse('1m1s1m', dialect='go'), 121)
+        self.assertEqual(timeparse.parse('1s1m', dialect='go'), 61)
+        self.assertEqual(timeparse.parse('1.s.5s', dialect='go'), 1.5)
+        self.assertEqual(timeparse.parse('0.1s0.2s', dialect='go', as_nanoseconds=True), 300000000)
+        self.assertEqual(timeparse.parse('5us5\u00b5s', dialect='go', as_nanoseconds=True), 10000)
+        self.assertEqual(timeparse._add_decimals('9.99', '.01'), '10.00')
+        self.assertEqual(timeparse._add_decimals('1.', '2'), '3')
+
+    def test_prometheus(self):
+        self.assertEqual(timeparse.parse('2d', dialect='prometheus'), 172800)
+        self.assertEqual(timeparse.parse('1y2w3d4h5m6s7ms', dialect='prometheus', as_nanoseconds=True),
+                         timeparse.parse('1y 2w 3d 4h 5m 6s 7ms', as_nanoseconds=True))
+        self.assertEqual(timeparse.parse('5ms', dialect='prometheus'), 0.005)
+        self.assertEqual(timeparse.parse('5m', dialect='prometheus'), 300)
+        self.assertEqual(timeparse.parse('0', dialect='prometheus'), 0)
+        self.assertEqual(timeparse.parse('1y2d', dialect='prometheus', as_timedelta=True), relativedelta(days=367))
+
+    def test_invalid(self):
+        for sval in ('', '5', '1.5', '1h 30m', ' 1h', '1H', '1d', '1h1x', '1s-1m', '1..5s', '-', '+-1s', '.s'):
+            self.assertIsNone(timeparse.parse(sval, dialect='go'), sval)
+            self.assertFalse(timeparse.is_duration(sval, dialect='go'), sval)
+        for sval in ('', '5', '1.5s', '-1s', '1m1h', '1d1d', '1mo', '1h 30m', 'PT1H'):
+            self.assertIsNone(timeparse.parse(sval, dialect='prometheus'), sval)
+            self.assertFalse(timeparse.is_duration(sval, dialect='prometheus'), sval)
+        self.assertTrue(timeparse.is_duration('1h30m', dialect='go'))
+        self.assertTrue(timeparse.is_duration('1h30m', dialect='prometheus', max_value=5400))
+        with self.assertRaisesRegex(ValueError, "Invalid go duration: '1h 30m'"):
+            timeparse.parse('1h 30m', dialect='go', raise_exception=True)
+        anchor = datetime.date(2020, 1, 1)
+        calls = (
+            lambda: timeparse.parse('1h', dialect='java'),
+            lambda: timeparse.is_duration('1h', dialect='java'),
+            lambda: timeparse.try_parse('1h', dialect='java'),
+            lambda: timeparse.parse_range('1h..2h', dialect='java'),
+            lambda: timeparse.preload(['1h'], dialect='java'),
+            lambda: timeparse.parse_into(['1h'], array.array('d', [0.0]), dialect='java'),
+            lambda: timeparse.parse_sum(['1h'], dialect='java'),
+            lambda: timeparse.parse_stats(['1h'], dialect='java'),
+            lambda: timeparse.parse_at('1h', anchor, dialect='java'),
+            lambda: timeparse.parse_at_many('1h', [anchor], dialect='java'),
+        )
+        for index, call in enumerate(calls):
+            with self.assertRaisesRegex(ValueError, "Unknown dialect 'java'", msg=index):
+                call()
+
+    def test_batches(self):
+        out = array.array('q', bytes(8 * 3))
+        self.assertEqual(timeparse.parse_into(['1m', '1ms', '1 min'], out, dialect='go'), 3)
+        self.assertEqual(out.tolist(), [60 * 10 ** 9, 10 ** 6, 0])
+        self.assertEqual(timeparse.try_parse('90s', dialect='go').value, 90)
+        self.assertEqual(timeparse.try_parse('90', dialect='go').error.message, "Invalid go duration: '90'")
+
+
+class TestIncrementalParser(unittest.TestCase):
+    """
+    Unit tests for `IncrementalParser`.
+    """
+
+    def states(self, sval, granularity='seconds'):
+        parser = timeparse.IncrementalParser(granularity)
+        return [parser.feed(char)[0] for char in sval]
+
+    def test_unit_aliases(self):
+        patterns = dict(zip(timeparse.MULTIPLIERS, (
+            timeparse.YEARS, timeparse.MONTHS, timeparse.WEEKS, timeparse.DAYS, timeparse.HOURS,
+            timeparse.MINS, timeparse.SECS, timeparse.MILLIS, timeparse.MICROS, timeparse.NANOS,
+        )))
+        self.assertEqual(tuple(timeparse.UNIT_ALIASES), tuple(timeparse.MULTIPLIERS))
+        for unit, aliases in timeparse.UNIT_ALIASES.items():
+            for alias in aliases:
+                self.assertTrue(re.fullmatch(patterns[unit], '1' + alias.upper(), re.I), alias)
+
+    def test_states(self):
+        # c - complete, p - prefix, d - dead
+        for sval, granularity, states in (
+                ('1h 30m', 'seconds', 'cccppc'),
+                (' - 1.5 hours, 2mo', 'seconds', 'pppcccccppccccpcd'),
+                ('2d, 4:13:02.5 ', 'seconds', 'ccccppppppcpcc'),
+                ('1w 4:13:00', 'seconds', 'cccppppppc'),
+                ('1y 4:13', 'seconds', 'cccpddd'),
+                ('100:30:00', 'seconds', 'cccpppppc'),
+                ('4:13:02:01:', 'seconds', 'cppcppcppcd'),
+                ('1:30.5:', 'seconds', 'cppcpcd'),
+                ('1:30 x', 'seconds', 'cppccd'),
+                ('1:30', 'minutes', 'cppc'),
+                (':30.5', 'seconds', 'ppcpc'),
+                (':30', 'minutes', 'ppp'),
+                ('1.5e-3 ', 'seconds', 'cccppcc'),
+                ('4:1e', 'seconds', 'cppd'),
+                ('1y 2mos. 3w', 'seconds', 'cccpcccccpc'),
+                ('1h.5M', 'seconds', 'ccppc'),
+                ('1\u03bcs', 'seconds', 'cpc'),
+                ('1s, 1m', 'seconds', 'ccdddd'),
+                ('1m 1h', 'seconds', 'cccpd'),
+                ('1 2', 'seconds', 'ccd'),
+                ('1ho 1', 'seconds', 'ccpdd'),
+                ('4: 1', 'seconds', 'cpdd'),
+                ('1e 1', 'seconds', 'cpdd'),
+                ('1.2.', 'seconds', 'cccd'),
+        ):
+            self.assertEqual(''.join(self.states(sval, granularity)), states, sval)
+            self.assertEqual(timeparse.parse(sval, granularity) is not None, states[-1] == 'c', sval)
+
+    def test_completions(self):
+        parser = timeparse.IncrementalParser()
+        self.assertEqual(parser.completions(), ())
+        parser.feed('5')
+        self.assertEqual(len(parser.completions()), sum(map(len, timeparse.UNIT_ALIASES.values())))
+        parser.feed(' D')
+        self.assertEqual(parser.completions(), ('dy', 'dys', 'day', 'days'))
+        parser.feed('ay, 4')
+        self.assertEqual(parser.completions()[:2], ('h', 'hr'))
+        self.assertEqual(parser.completions()[-1], 'nanoseconds')
+        parser.feed(':')
+        self.assertEqual(parser.completions(), ())
+        self.assertEqual(parser.text, '5 Day, 4:')
+        self.assertEqual(parser.state, 'prefix')
+        self.assertEqual(parser.feed('00:00'), 'complete')
+        self.assertEqual(timeparse.parse(parser.text), 5 * 86400 + 4 * 3600)
+
+
+class TestNanosecondsOutput(unittest.TestCase):
+    """
+    Unit tests for the `parse` function with `as_nanoseconds=True`.
+    """
+
+    def test_units(self):
+        self.assertEqual(timeparse.parse('1 ns', as_nanoseconds=True), 1)
+        self.assertEqual(timeparse.parse('3 us', as_nanoseconds=True), 3000)
+        self.assertEqual(timeparse.parse('1.5 ms', as_nanoseconds=True), 1500000)
+        self.assertEqual(timeparse.parse('1.2 m', as_nanoseconds=True), 72 * 10 ** 9)
+        self.assertEqual(timeparse.parse('1y2mo3w4d5h6m7s8ms9us10ns', as_nanoseconds=True),
+                         timeparse.parse('1y2mo3w4d5h6m7s', as_nanoseconds=True) + 8009010)
+
+    def test_signs_and_numbers(self):
+        self.assertEqual(timeparse.parse('-32m', as_nanoseconds=True), -1920 * 10 ** 9)
+        self.assertEqual(timeparse.parse('+ 4:13:02.266', as_nanoseconds=True), 15182266000000)
+        self.assertEqual(timeparse.parse('-10.000000001', as_nanoseconds=True), -10000000001)
+        self.assertEqual(timeparse.parse(10, as_nanoseconds=True), 10 ** 10)
+        self.assertEqual(timeparse.parse(0.5, as_nanoseconds=True), 5 * 10 ** 8)
+        self.assertEqual(timeparse.parse('1e3', as_nanoseconds=True), 10 ** 12)
+
+    def test_precision(self):
+        self.assertEqual(timeparse.parse('1000 days 1 ns', as_nanoseconds=True), 1000 * 86400 * 10 ** 9 + 1)
+        self.assertEqual(timeparse.parse('0.0000000015 s', as_nanoseconds=True), 2)
+
+    def test_granularity(self):
+        self.assertEqual(timeparse.parse('4:32', granularity='minutes', as_nanoseconds=True), 272 * 60 * 10 ** 9)
+
+    def test_unparsed(self):
+        self.assertIsNone(timeparse.parse('1.1.1 s', as_nanoseconds=True))
+        self.assertIsNone(timeparse.parse('ten', as_nanoseconds=True))
+        with self.assertRaises(ValueError):
+            timeparse.parse('1.1.1 s', as_nanoseconds=True, raise_exception=True)
+
+    def test_parse_into(self):
+        out = array.array('q', bytes(8 * 2))
+        values = iter(['1h', 'ten', '10 ns'])
+        self.assertEqual(timeparse.parse_into(values, out), 2)
+        self.assertEqual(out.tolist(), [3600 * 10 ** 9, 0])
+        self.assertEqual(timeparse.parse_into(values, out), 1)
+        self.assertEqual(out.tolist(), [10, 0])
+        self.assertEqual(timeparse.parse_into([], out), 0)
+        timeparse.parse_into(['1000 years'], out)
+        self.assertEqual(out[0], 0)
+        with self.assertRaises(TypeError):
+            timeparse.parse_into(['1h'], array.array('i', [0]))
+
+    def test_parse_into_float(self):
+        out = array.array('d', bytes(8 * 3))
+        self.assertEqual(timeparse.parse_into(['1h', '1000 years', '1.5 ms'], out), 3)
+        self.assertEqual(out.tolist(), [3600.0, 1000 * 365 * 86400.0, 0.0015])
+        timeparse.parse_into(['ten'], out)
+        self.assertTrue(math.isnan(out[0]))
+        out = array.array('f', [0.0])
+        timeparse.parse_into(['1.5 s'], out)
+        self.assertEqual(out[0], 1.5)
+
+    def test_parse_into_float_too_large(self):
+        out, valid = array.array('d', [0.0, 0.0]), bytearray(b'\xff')
+        self.assertEqual(timeparse.parse_into(['1' + '0' * 400 + ' years', '1h'], out, valid=valid), 2)
+        self.assertTrue(math.isnan(out[0]))
+        self.assertEqual(out[1], 3600.0)
+        self.assertEqual(valid[0] & 0b11, 0b10)
+        out, valid = array.array('f', [0.0, 0.0]), bytearray(b'\xff')
+        self.assertEqual(timeparse.parse_into(['1e39', '-1e39 s'], out, valid=valid), 2)
+        self.assertTrue(math.isnan(out[0]) and math.isnan(out[1]))
+        self.assertEqual(valid[0] & 0b11, 0)
+        timeparse.parse_into(['1e38'], out)
+        self.assertEqual(out[0], array.array('f', [1e38])[0])
+
+    def test_parse_into_valid(self):
+        out, valid = array.array('q', bytes(8 * 10)), bytearray(b'\xff\x00')
+        self.assertEqual(timeparse.parse_into(['1h', 'ten', '1s'] * 3 + ['1000 years'], out, valid=valid), 10)
+        self.assertEqual(valid, bytearray([0b01101101, 0b00000001]))
+        with self.assertRaises(ValueError):
+            timeparse.parse_into(['1h'], out, valid=bytearray(1))
+
+
+class TestAggregation(unittest.TestCase):
+    """
+    Unit tests for `parse_sum` and `parse_stats`.
+    """
+
+    def test_sum(self):
+        values = ['1h30m', '45 min', 'ten', '1.5 us', 2, 0.5, '10', '-4:13:02', 'P1Y2M']
+        expected = sum(filter(None, (timeparse.parse(sval, as_nanoseconds=True) for sval in values)))
+        self.assertEqual(timeparse.parse_sum(iter(values), as_nanoseconds=True), expected)
+        self.assertEqual(timeparse.parse_sum(values), expected / 10 ** 9)
+        self.assertEqual(timeparse.parse_sum(['1h', '30m']), 5400)
+        self.assertEqual(timeparse.parse_sum(['1:30', '0:30'], granularity='minutes'), 7200)
+        self.assertEqual(timeparse.parse_sum(['1h', '1 h'], dialect='go'), 3600)
+        self.assertEqual(timeparse.parse_sum([]), 0)
+        with self.assertRaises(ValueError):
+            timeparse.parse_sum(values, raise_exception=True)
+
+    def test_sum_timedelta(self):
+        self.assertEqual(
+            timeparse.parse_sum(['1y 1.5mo', '2mo', '-1d', '1.5 us'], as_timedelta=True),
+            relativedelta(years=1, months=2, days=44, microseconds=2),
+        )
+        self.assertEqual(timeparse.parse_sum(['1h', '-3h'], as_timedelta=True), relativedelta(hours=-2))
+        for sval in ('1.0y', '1.y', '2.00mo', '-1.0y 1.0mo'):
+            self.assertEqual(
+                timeparse.parse_sum([sval], as_timedelta=True),
+                timeparse.parse(sval, as_timedelta=True),
+                sval,
+            )
+        timeparse.disable_dateutil()
+        try:
+            self.assertEqual(
+                timeparse.parse_sum(['1y', '1mo', '-1d', '1.5 us'], as_timedelta=True),
+                datetime.timedelta(days=365 + 30 - 1, microseconds=2),
+            )
+        finally:
+            timeparse.enable_dateutil()
+
+    def test_stats(self):
+        values = ['1h30m', '45 min', 'ten', '-1.5 us', None]
+        self.assertEqual(
+            timeparse.parse_stats(values),
+            timeparse.DurationStats(3, 2, 8099.9999985, -1.5e-06, 5400, 2699.9999995),
+        )
+        self.assertEqual(
+            timeparse.parse_stats(values, as_nanoseconds=True),
+            timeparse.DurationStats(3, 2, 8099999998500, -1500, 5400000000000, 2699999999500),
+        )
+        self.assertEqual(timeparse.parse_stats(['1m', '2m']).mean, 90)
+        self.assertEqual(timeparse.parse_stats(['ten']), timeparse.DurationStats(0, 1, 0, None, None, None))
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestArrowOutput(unittest.TestCase):
+    """
+    Unit tests for the `parse_arrow` function.
+    """
+
+    def test_string_array(self):
+        result = timeparse.parse_arrow(pyarrow.array(['ten', '1h', None, '1.5 us', '1h'])[1:])
+        self.assertEqual(result.type, pyarrow.duration('ns'))
+        self.assertEqual(result.cast(pyarrow.int64()).to_pylist(), [3600 * 10 ** 9, None, 1500, 3600 * 10 ** 9])
+        result = timeparse.parse_arrow(pyarrow.array(['1h', '4:32', None], type=pyarrow.large_string()), 'minutes')
+        self.assertEqual(result.cast(pyarrow.int64()).to_pylist(), [3600 * 10 ** 9, 272 * 60 * 10 ** 9, None])
+        self.assertEqual(len(timeparse.parse_arrow(pyarrow.array([None, None], type=pyarrow.string()))), 2)
+
+    def test_dictionary_array(self):
+        values = pyarrow.array(['1s', 'ten', None, '1s']).dictionary_encode()
+        result = timeparse.parse_arrow(values)
+        self.assertEqual(result.cast(pyarrow.int64()).to_pylist(), [10 ** 9, None, None, 10 ** 9])
+
+    def test_chunked_array(self):
+        values = pyarrow.chunked_array([pyarrow.array(['1h']), pyarrow.array(['3s', None])])
+        result = timeparse.parse_arrow(values)
+        self.assertIsInstance(result, pyarrow.ChunkedArray)
+        self.assertEqual(result.num_chunks, 2)
+        self.assertEqual(result.cast(pyarrow.int64()).to_pylist(), [3600 * 10 ** 9, 3 * 10 ** 9, None])
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            timeparse.parse_arrow(pyarrow.array([1, 2]))
+
+
+class TestTryParse(unittest.TestCase):
+    """
+    Unit tests for the `try_parse` function.
+    """
+
+    def test_values(self):
+        self.assertEqual(tuple(timeparse.try_parse('1h 30m')), (5400, None))
+        self.assertEqual(tuple(timeparse.try_parse('-1.5 s')), (-1.5, None))
+        self.assertEqual(tuple(timeparse.try_parse('-10')), (-10, None))
+        self.assertEqual(tuple(timeparse.try_parse(10)), (10, None))
+        self.assertEqual(tuple(timeparse.try_parse('1e3')), (1000, None))
+        self.assertEqual(tuple(timeparse.try_parse('4:32', 'minutes')), (272 * 60, None))
+        self.assertEqual(tuple(timeparse.try_parse('1.5 us', as_nanoseconds=True)), (1500, None))
+        self.assertEqual(tuple(timeparse.try_parse('1h', as_timedelta=True)), (relativedelta(hours=1), None))
+
+    def test_errors(self):
+        value, error = timeparse.try_parse('- 1h 30x')
+        self.assertIsNone(value)
+        self.assertEqual(error.position, 7)
+        self.assertEqual(error.expected, 'unit')
+        self.assertEqual(error.units, ('minutes', 'seconds', 'milliseconds', 'microseconds', 'nanoseconds'))
+        self.assertEqual(error.patterns, (0, 1))
+        self.assertIn('position 7', error.message)
+
+        error = timeparse.try_parse('32 m - 1 s').error
+        self.assertEqual((error.position, error.expected), (5, 'number'))
+        self.assertEqual(error.units, ('seconds', 'milliseconds', 'microseconds', 'nanoseconds'))
+
+        error = timeparse.try_parse('ten').error
+        self.assertEqual((error.position, error.expected, error.patterns), (0, 'number', ()))
+        self.assertEqual(error.units, tuple(timeparse.MULTIPLIERS))
+
+    def test_conversion_errors(self):
+        value, error = timeparse.try_parse('1.1.1.1 h')
+        self.assertIsNone(value)
+        self.assertEqual(error.expected, 'number')
+        self.assertIn('1.1.1.1', error.message)
+        self.assertIsNotNone(timeparse.try_parse('1.1 - 1').error)
+        self.assertIsNotNone(timeparse.try_parse(float('nan')).error)
+
+
+class TestRange(unittest.TestCase):
+    """
+    Unit tests for `parse_range`.
+    """
+
+    def test_separators(self):
+        for sval in ('5-10 min', '5 - 10 min ', '5\u201310 min', '5 to 10 min', '5 TO 10min', '5..10 min', '5m..10m'):
+            self.assertEqual(timeparse.parse_range(sval), (300, 600), sval)
+        self.assertEqual(timeparse.parse_range('30s to 2m'), (30, 120))
+        self.assertEqual(timeparse.parse_range('1.5..2.5h'), (5400, 9000))
+        self.assertEqual(timeparse.parse_range('PT1H..PT2H'), (3600, 7200))
+        self.assertEqual(timeparse.parse_range('10:00-12:00'), (600, 720))
+        self.assertEqual(timeparse.parse_range('10:00-12:00', granularity='minutes'), (36000, 43200))
+
+    def test_shared_unit(self):
+        self.assertEqual(timeparse.parse_range('5-10'), (5, 10))
+        self.assertEqual(timeparse.parse_range('1-2h 30m'), (3600, 9000))
+        self.assertEqual(timeparse.parse_range('-5-10s'), (-5, 10))
+        self.assertEqual(timeparse.parse_range('1 - -2h'), (3600, -7200))
+        self.assertEqual(timeparse.parse_range('5 to 10 \u03bcs', as_nanoseconds=True), (5000, 10000))
+        self.assertEqual(timeparse.parse_range('1-2h', dialect='go'), None)
+        self.assertEqual(timeparse.parse_range('1h-2h', dialect='go'), (3600, 7200))
+        self.assertEqual(
+            timeparse.parse_range('1..2 mo', as_timedelta=True),
+            (relativedelta(months=1), relativedelta(months=2)),
+        )
+
+    def test_invalid(self):
+        for sval in ('5', '-5', '5 min', '5-', '-5-', 'x-y', '5-10x', '1..2..3'):
+            self.assertIsNone(timeparse.parse_range(sval), sval)
+        with self.assertRaisesRegex(ValueError, 'Range separator not found'):
+            timeparse.parse_range('5 min', raise_exception=True)
+
+
+class TestNormalization(unittest.TestCase):
+    """
+    Expressions are stripped, lowercased and their whitespace is collapsed
+    before match.
+    """
+
+    def test_results(self):
+        for sval in ('1H 30M', '  1h\t\t30m  ', '1h\n30m', '- 1 HOUR', 'pt1h', 'P1y2M', '1.5 US', '10:00', '1E3'):
+            for kwargs in ({}, {'granularity': 'minutes'}, {'as_nanoseconds': True}):
+                self.assertEqual(
+                    timeparse.parse(sval, **kwargs),
+                    timeparse.parse(' '.join(sval.split()).lower(), **kwargs),
+                    (sval, kwargs),
+                )
+        self.assertEqual(timeparse.parse('1h\n30m'), 5400)
+        self.assertEqual(timeparse.parse('-\n1h'), -3600)
+
+    def test_unicode(self):
+        self.assertEqual(timeparse.parse('1.5 \u00b5s', as_nanoseconds=True), 1500)
+        self.assertEqual(timeparse.parse('1.5 \u03bcs', as_nanoseconds=True), 1500)
+        self.assertEqual(timeparse.parse('1.5 \u039cS', as_nanoseconds=True), 1500)
+        self.assertEqual(timeparse.parse('1 \u017fec'), 1)
+        self.assertEqual(timeparse.parse('2yr\u0130'), 63072000)
+        self.assertIsNone(timeparse.parse('1 \u03bcx'))
+        self.assertEqual(timeparse.parse('4:32 \u03bcs', granularity='minutes'), None)
+
+    def test_dialects(self):
+        self.assertIsNone(timeparse.parse('1H', dialect='go'))
+        self.assertIsNone(timeparse.parse(' 1h', dialect='prometheus'))
+
+    def test_error_positions(self):
+        self.assertEqual(timeparse.try_parse('  1H 30X').error.position, 7)
+        self.assertEqual(timeparse.try_parse('-  1h\t\t30x').error.position, 9)
+        self.assertEqual(timeparse.try_parse('1h\n30x').error.position, 5)
+
+
+timedelta_max_seconds = datetime.timedelta.max.total_seconds()
+
+
+class TestOverflow(unittest.TestCase):
+    """
+    Unit tests for overflow policies of `parse`.
+    """
+    values = (
+        '99999999999 years', '1000000000 days', '999999999 days 23:59:59.9999996', '1e20', '1e999', 1e20, 10 ** 400,
+    )
+
+    def test_none(self):
+        for sval in self.values:
+            self.assertIsNone(timeparse.parse(sval), sval)
+            self.assertIsNone(timeparse.parse('-' + sval if isinstance(sval, str) else -sval), sval)
+            with self.assertRaisesRegex(OverflowError, 'out of timedelta range'):
+                timeparse.parse(sval, raise_exception=True)
+        self.assertEqual(timeparse.parse('999999999 days'), 86399999913600)
+        self.assertEqual(timeparse.parse('999999999 days 23:59:59.999999'), timedelta_max_seconds)
+        self.assertEqual(timeparse.parse('1234567 minutes'), 74074020)
+        self.assertEqual(timeparse.parse('9999999 ms'), 9999.999)
+
+    def test_raise(self):
+        for sval in self.values:
+            with self.assertRaisesRegex(OverflowError, 'out of timedelta range'):
+                timeparse.parse(sval, overflow='raise')
+        with self.assertRaisesRegex(OverflowError, 'out of timedelta range'):
+            timeparse.parse(timedelta_max_seconds, overflow='raise')
+        self.assertIsNone(timeparse.parse('ten', overflow='raise'))
+        self.assertEqual(timeparse.parse('1h', overflow='raise'), 3600)
+        self.assertIn('out of timedelta range', timeparse.try_parse('99999999999 years').error.message)
+
+    def test_saturate(self):
+        for sval in self.values:
+            self.assertEqual(timeparse.parse(sval, overflow='saturate'), timedelta_max_seconds, sval)
+            negative = '-' + sval if isinstance(sval, str) else -sval
+            self.assertEqual(timeparse.parse(negative, overflow='saturate'), -86399999913600, sval)
+        timeparse.disable_dateutil()
+        try:
+            self.assertEqual(
+                timeparse.parse('1e20', overflow='saturate', as_timedelta=True),
+                datetime.timedelta.max,
+            )
+            self.assertEqual(
+                timeparse.parse('-1000000000 days', overflow='saturate', as_timedelta=True),
+                datetime.timedelta.min,
+            )
+        finally:
+            timeparse.enable_dateutil()
+        self.assertEqual(timeparse.parse('1h', overflow='saturate'), 3600)
+
+    def test_unlimited_results(self):
+        self.assertEqual(timeparse.parse(10 ** 400, as_nanoseconds=True), 10 ** 409)
+        self.assertEqual(
+            timeparse.parse(-10 ** 30, overflow='raise', as_timedelta=True),
+            relativedelta(seconds=-10 ** 30),
+        )
+        self.assertEqual(
+            timeparse.parse('1000000000 days', overflow='raise', as_nanoseconds=True),
+            86400 * 10 ** 18,
+        )
+        self.assertEqual(
+            timeparse.parse('1000000000 days', overflow='raise', as_timedelta=True),
+            relativedelta(days=1000000000),
+        )
+
+    def test_cheap_magnitude_check(self):
+        with mock.patch.object(timeparse, '_decimal_to_nanoseconds', wraps=timeparse._decimal_to_nanoseconds) as m:
+            self.assertEqual(timeparse.parse('2 days, 4:13:02'), 187982)
+            self.assertEqual(timeparse.parse('123456 weeks'), 74666188800)
+            m.assert_not_called()
+            self.assertIsNone(timeparse.parse('1234567890 weeks'))
+            m.assert_called()
+
+    def test_unknown_policy(self):
+        with self.assertRaisesRegex(ValueError, 'Unknown overflow policy'):
+            timeparse.parse('1h', overflow='wrap')
+
+
+class TestAnchored(unittest.TestCase):
+    """
+    Unit tests for `parse_at` and `parse_at_many`.
+    """
+
+    def test_calendar(self):
+        anchor = datetime.datetime(2024, 1, 31, 12, 30)
+        self.assertEqual(timeparse.parse_at('1mo', anchor), datetime.datetime(2024, 2, 29, 12, 30))
+        self.assertEqual(timeparse.parse_at('13mo', anchor), datetime.datetime(2025, 2, 28, 12, 30))
+        self.assertEqual(timeparse.parse_at('-2 months', anchor), datetime.datetime(2023, 11, 30, 12, 30))
+        self.assertEqual(timeparse.parse_at('1y', datetime.datetime(2024, 2, 29)), datetime.datetime(2025, 2, 28))
+        self.assertEqual(timeparse.parse_at('4y', datetime.datetime(2096, 2, 29)), datetime.datetime(2100, 2, 28))
+        self.assertEqual(timeparse.parse_at('1y', datetime.datetime(1999, 2, 28)), datetime.datetime(2000, 2, 28))
+        self.assertEqual(timeparse.parse_at('1mo', datetime.datetime(2000, 1, 29)), datetime.datetime(2000, 2, 29))
+        self.assertEqual(timeparse.parse_at('1mo 1d', anchor), datetime.datetime(2024, 3, 1, 12, 30))
+        self.assertEqual(timeparse.parse_at('P1Y2M', anchor), datetime.datetime(2025, 3, 31, 12, 30))
+
+    def test_fixed(self):
+        anchor = datetime.datetime(2024, 1, 31, 12, 30)
+        self.assertEqual(timeparse.parse_at('1h 30m', anchor), datetime.datetime(2024, 1, 31, 14, 0))
+        self.assertEqual(timeparse.parse_at('-1.5 us', anchor), anchor - datetime.timedelta(microseconds=2))
+        self.assertEqual(timeparse.parse_at('90', anchor), anchor + datetime.timedelta(seconds=90))
+        self.assertEqual(timeparse.parse_at(-1.5, anchor), anchor - datetime.timedelta(seconds=1.5))
+        self.assertEqual(timeparse.parse_at('1:30', anchor, 'minutes'), datetime.datetime(2024, 1, 31, 14, 0))
+        self.assertEqual(timeparse.parse_at('1h30m', anchor, dialect='go'), datetime.datetime(2024, 1, 31, 14, 0))
+
+    def test_anchor_types(self):
+        self.assertEqual(timeparse.parse_at('1mo 1w', datetime.date(2023, 1, 31)), datetime.date(2023, 3, 7))
+        self.assertEqual(timeparse.parse_at('1d 1h', datetime.date(2023, 1, 31)), datetime.datetime(2023, 2, 1, 1))
+        zone = datetime.timezone(datetime.timedelta(hours=3))
+        self.assertEqual(
+            timeparse.parse_at('1mo', datetime.datetime(2023, 1, 31, tzinfo=zone)),
+            datetime.datetime(2023, 2, 28, tzinfo=zone),
+        )
+
+    def test_same_as_relativedelta(self):
+        anchors = [datetime.datetime(2023, 1, 1, 12) + datetime.timedelta(days=days) for days in range(0, 731, 3)]
+        for sval in ('1y', '-1y 1mo', '11 months', '1mo 2d 3h', '1.0 years', '-36mo', '1 day, 4:13:02'):
+            delta = timeparse.parse(sval, as_timedelta=True)
+            self.assertEqual(timeparse.parse_at_many(sval, anchors), [anchor + delta for anchor in anchors], sval)
+
+    def test_many(self):
+        anchors = (datetime.date(2023, 1, 31), datetime.date(2024, 1, 31), datetime.date(9999, 12, 31))
+        self.assertEqual(
+            timeparse.parse_at_many('1mo', iter(anchors)),
+            [datetime.date(2023, 2, 28), datetime.date(2024, 2, 29), None],
+        )
+        self.assertEqual(
+            timeparse.parse_at_many('12h', anchors[:2]),
+            [datetime.datetime(2023, 1, 31, 12), datetime.datetime(2024, 1, 31, 12)],
+        )
+        self.assertEqual(timeparse.parse_at_many('ten', anchors), [None, None, None])
+        self.assertEqual(timeparse.parse_at_many('1mo', []), [])
+
+    def test_invalid(self):
+        anchor = datetime.datetime(2024, 1, 31)
+        for sval in ('ten', '1.5 months', '10000y', '-2024y'):
+            self.assertIsNone(timeparse.parse_at(sval, anchor), sval)
+        with self.assertRaisesRegex(ValueError, 'ambiguous'):
+            timeparse.parse_at('1.5 months', anchor, raise_exception=True)
+        with self.assertRaisesRegex(ValueError, 'ambiguous'):
+            timeparse.parse_at_many('1.5 months', [anchor], raise_exception=True)
+        with self.assertRaises(ValueError):
+            timeparse.parse_at_many('1y', [datetime.datetime(9999, 1, 1)], raise_exception=True)
+
+
+class TestDurationColumn(unittest.TestCase):
+    """
+    Unit tests for `DurationColumn`.
+    """
+    svals = ['1h', '90s', '1h', 'ten', '1.5 us', '90s', '1000000 years']
+
+    def test_codes(self):
+        column = timeparse.DurationColumn(self.svals)
+        self.assertEqual(column.strings, ('1h', '90s', 'ten', '1.5 us', '1000000 years'))
+        self.assertEqual(column.codes.tolist(), [0, 1, 0, 2, 3, 1, 4])
+        self.assertEqual(column.codes.format, 'I')
+        self.assertEqual(len(column), 7)
+        self.assertEqual(list(column), [timeparse.parse_sum([sval]) if sval != 'ten' else None for sval in self.svals])
+        self.assertEqual((column[0], column[-1], column[3]), (3600, 31536000000000, None))
+        self.assertEqual(repr(column), '<DurationColumn of 7 values, 5 distinct>')
+        self.assertEqual(len(timeparse.DurationColumn()), 0)
+        with self.assertRaises(IndexError):
+            column[7]
+
+    def test_parsed_once(self):
+        with mock.patch.object(timeparse, 'parse', wraps=timeparse.parse) as parse:
+            timeparse.DurationColumn(self.svals)
+        self.assertEqual(parse.call_count, 5)
+
+    def test_parse_arguments(self):
+        self.assertEqual(list(timeparse.DurationColumn(['4:32'], granularity='minutes')), [16320])
+        self.assertEqual(list(timeparse.DurationColumn(['1h30m', '1h 30m'], dialect='go')), [5400, None])
+
+    def test_slices(self):
+        column = timeparse.DurationColumn(self.svals)
+        for item in (slice(1, None), slice(None, None, 2), slice(None, None, -1), slice(5, 2), slice(-3, None)):
+            view = column[item]
+            self.assertEqual(list(view), list(column)[item], item)
+            self.assertEqual(view.nanoseconds().tolist(), column.nanoseconds().tolist()[item], item)
+            self.assertIs(view.strings, column.strings)
+            self.assertIs(view.codes.obj, column.codes.obj)
+        self.assertEqual(list(column[1:][::2]), [90, None, 90])
+
+    def test_conversions(self):
+        column = timeparse.DurationColumn(self.svals)
+        seconds = column.seconds()
+        self.assertEqual(seconds.typecode, 'd')
+        self.assertEqual(seconds[:3].tolist(), [3600.0, 90.0, 3600.0])
+        self.assertTrue(math.isnan(seconds[3]))
+        self.assertEqual(seconds[4], 1.5e-06)
+        self.assertEqual(
+            [item for item in seconds if not math.isnan(item)],
+            [item for item in column if item is not None],
+        )
+        nanoseconds = column.nanoseconds()
+        self.assertEqual(nanoseconds.typecode, 'q')
+        self.assertEqual(nanoseconds.tolist(), [
+            3600 * 10 ** 9, 90 * 10 ** 9, 3600 * 10 ** 9, timeparse.INT64_MIN, 1500, 90 * 10 ** 9, timeparse.INT64_MIN,
+        ])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_timedelta64(self):
+        result = timeparse.DurationColumn(self.svals)[1:].timedelta64()
+        self.assertEqual(result.dtype, numpy.dtype('m8[ns]'))
+        self.assertEqual(result[:3].astype('int64').tolist(), [90 * 10 ** 9, 3600 * 10 ** 9, timeparse.INT64_MIN])
+        self.assertTrue(numpy.isnat(result[2]) and numpy.isnat(result[5]))
+        self.assertEqual(result[3], numpy.timedelta64(1500, 'ns'))
+
+
+class TestLazyParse(unittest.TestCase):
+    """
+    Unit tests for `iparse`.
+    """
+
+    def test_results(self):
+        svals = ['1h', 90, '1h', 'ten', 1.5, ' 1h', '1:30']
+        self.assertEqual(list(timeparse.iparse(svals)), [timeparse.parse(sval) for sval in svals])
+        self.assertEqual(list(timeparse.iparse(svals, chunk=1)), [timeparse.parse(sval) for sval in svals])
+        self.assertEqual(list(timeparse.iparse(iter(svals), chunk=3, granularity='minutes')), [
+            timeparse.parse(sval, granularity='minutes') for sval in svals
+        ])
+        self.assertEqual(list(timeparse.iparse(['1h', '2h'], as_nanoseconds=True)), [3600 * 10 ** 9, 7200 * 10 ** 9])
+        self.assertEqual(
+            list(timeparse.iparse(['1h30m'], dialect='go', as_timedelta=True)),
+            [relativedelta(hours=1, minutes=30)],
+        )
+        self.assertEqual(list(timeparse.iparse([])), [])
+
+    def test_laziness(self):
+        pulled = []
+
+        def source():
+            for index in itertools.count():
+                pulled.append(index)
+                yield '1m'
+
+        values = timeparse.iparse(source(), chunk=4)
+        self.assertEqual(pulled, [])
+        self.assertEqual(list(itertools.islice(values, 5)), [60] * 5)
+        self.assertEqual(len(pulled), 8)
+
+    def test_deduplication(self):
+        with mock.patch.object(timeparse, 'parse', wraps=timeparse.parse) as parse:
+            self.assertEqual(list(timeparse.iparse(['1h'] * 10 + ['2h'] * 10, chunk=10)), [3600] * 10 + [7200] * 10)
+        self.assertEqual(parse.call_count, 2)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(timeparse.iparse(['1h', 'ten'], raise_exception=True))
+        with self.assertRaisesRegex(ValueError, 'Chunk size'):
+            next(timeparse.iparse(['1h'], chunk=0))
+
+
+class TestExpression(unittest.TestCase):
+    """
+    Unit tests for `parse_expression`.
+    """
+
+    def test_operators(self):
+        self.assertEqual(timeparse.parse_expression('2h - 15m'), 6300)
+        self.assertEqual(timeparse.parse_expression('3 * 45s'), 135)
+        self.assertEqual(timeparse.parse_expression('3x45s'), 135)
+        self.assertEqual(timeparse.parse_expression('45s X 3'), 135)
+        self.assertEqual(timeparse.parse_expression('2 \u00d7 1.5 \u00b5s', as_nanoseconds=True), 3000)
+        self.assertEqual(timeparse.parse_expression('1h / 3 * 3'), 3600)
+        self.assertEqual(timeparse.parse_expression('1ns / 2', as_nanoseconds=True), 1)
+        self.assertEqual(timeparse.parse_expression('-1ns / 2', as_nanoseconds=True), 0)
+        self.assertEqual(timeparse.parse_expression('1h / 8'), 450)
+        self.assertEqual(timeparse.parse_expression('1s / 8'), 0.125)
+
+    def test_precedence(self):
+        self.assertEqual(timeparse.parse_expression('1h + 2 * 15m'), 5400)
+        self.assertEqual(timeparse.parse_expression('(1h + 15m) * 2'), 9000)
+        self.assertEqual(timeparse.parse_expression('1h - 30m - 15m'), 900)
+        self.assertEqual(timeparse.parse_expression('- (1h - 3h) * 2'), 14400)
+        self.assertEqual(timeparse.parse_expression('2 * -1h'), -7200)
+        self.assertEqual(timeparse.parse_expression('+1h'), 3600)
+        self.assertEqual(timeparse.parse_expression('(2 + 1) * (1 + 1) * 10m'), 3600)
+
+    def test_terms(self):
+        self.assertEqual(timeparse.parse_expression('1 day, 2 hours - 1h'), 90000)
+        self.assertEqual(timeparse.parse_expression('2 days, 4:13:02 - 2d'), 15182)
+        self.assertEqual(timeparse.parse_expression('10:00 - 5:00'), 300)
+        self.assertEqual(timeparse.parse_expression('10:00 - 5:00', granularity='minutes'), 18000)
+        self.assertEqual(timeparse.parse_expression('1mo - 29d'), 86400)
+        self.assertEqual(timeparse.parse_expression(' 90 '), 90)
+        self.assertEqual(timeparse.parse_expression('2 * 45'), 90)
+        self.assertEqual(timeparse.parse_expression('.5 * 3'), 1.5)
+
+    def test_conversion(self):
+        self.assertEqual(timeparse.parse_expression('1h - 2h', as_timedelta=True), relativedelta(hours=-1))
+        timeparse.disable_dateutil()
+        try:
+            self.assertEqual(
+                timeparse.parse_expression('1h - 1us', as_timedelta=True),
+                datetime.timedelta(hours=1, microseconds=-1),
+            )
+            for sval in ('-1.5us', '1.5us', '-2.7us'):
+                expected = timeparse.parse(sval, as_timedelta=True)
+                self.assertEqual(timeparse.parse_expression(sval, as_timedelta=True), expected, sval)
+                self.assertEqual(timeparse.parse_sum([sval], as_timedelta=True), expected, sval)
+        finally:
+            timeparse.enable_dateutil()
+
+    def test_invalid(self):
+        for sval in ('', '1h +', '(1h', '1h)', '()', '3 20min', '1h * 1h', '1h / 1h', '2 / 1h', '1h + 2',
+                     '1h / 0', '* 1h', '1h (2)', '1 h ,', '1x', '1 foo', '1h 2:00', '1:2:3:4:5', 'ten'):
+            self.assertIsNone(timeparse.parse_expression(sval), sval)
+        with self.assertRaisesRegex(ValueError, 'Missing operand'):
+            timeparse.parse_expression('1h +', raise_exception=True)
+        with self.assertRaisesRegex(ValueError, 'Cannot add'):
+            timeparse.parse_expression('1h + 2', raise_exception=True)
+        with self.assertRaisesRegex(ValueError, 'Too long number'):
+            timeparse.parse_expression('1h * ' + '1' * 5000, raise_exception=True)
+        self.assertEqual(timeparse.parse_expression('1h * 0.' + '0' * 4297 + '1', as_nanoseconds=True), 0)
+        self.assertEqual(timeparse.parse_expression('1' + ' * 2' * 128), 2 ** 128)
+        self.assertEqual(timeparse.parse_expression('1' + ' / 3' * 80 + ' * 1s', as_nanoseconds=True), 0)
+        for sval in ('1' + ' * 2' * 129, '1h' + ' * 9' * 40, '1' + ' / 3' * 81 + ' * 1s'):
+            with self.assertRaisesRegex(ValueError, 'Too large value'):
+                timeparse.parse_expression(sval, raise_exception=True)
+
+    def test_cache(self):
+        timeparse.EXPRESSION_PROGRAMS.clear()
+        self.assertEqual(timeparse.parse_expression('1h + 1m'), 3660)
+        self.assertEqual(timeparse.parse_expression('1h + 1m'), 3660)
+        self.assertEqual(timeparse.parse_expression('1h + 1m', granularity='minutes'), 3660)
+        self.assertEqual(len(timeparse.EXPRESSION_PROGRAMS), 2)
+        self.assertIsNone(timeparse.parse_expression('1h +'))
+        self.assertEqual(len(timeparse.EXPRESSION_PROGRAMS), 2)
+
+        maxsize = timeparse.EXPRESSION_PROGRAMS_MAXSIZE
+        timeparse.EXPRESSION_PROGRAMS_MAXSIZE = 2
+        try:
+            self.assertEqual(timeparse.parse_expression('1h + 2m'), 3720)
+            self.assertEqual(list(timeparse.EXPRESSION_PROGRAMS), [('1h + 1m', 'minutes'), ('1h + 2m', 'seconds')])
+        finally:
+            timeparse.EXPRESSION_PROGRAMS_MAXSIZE = maxsize
+            timeparse.EXPRESSION_PROGRAMS.clear()
+
+
+class TestValidation(unittest.TestCase):
+    """
+    Unit tests for the `is_duration` function.
+    """
+
+    def test_valid(self):
+        for sval in ('1h 30m', '-1.5 s', '10', '-10.5', '1e5', ':13', '4:32', '2 days, 4:13:02', '1.5 µs', '|9'):
+            self.assertTrue(timeparse.is_duration(sval), sval)
+            self.assertIsNotNone(timeparse.parse(sval), sval)
+        self.assertTrue(timeparse.is_duration(10))
+        self.assertTrue(timeparse.is_duration('4:32', granularity='minutes'))
+
+    def test_numbers(self):
+        for value in (10, -10.5, 86399999999999, -86399999913600, -86399999913601, 1e20, 10 ** 400, float('nan')):
+            self.assertEqual(timeparse.is_duration(value), timeparse.parse(value) is not None, value)
+
+    def test_invalid(self):
+        for sval in ('', ' ', 'ten', '1h 30x', '1h!', '32 m - 1 s', '1.1.1 s', '1e999999999', '1000000000 days'):
+            self.assertFalse(timeparse.is_duration(sval), sval)
+        # Beyond the limit of ``int`` conversion of long digit runs.
+        for sval in ('1' * 5000, '1' * 5000 + 'h', '0.' + '1' * 5000 + ' s'):
+            self.assertFalse(timeparse.is_duration(sval), sval[-10:])
+
+    def test_limits(self):
+        self.assertTrue(timeparse.is_duration('1h', max_length=2))
+        self.assertFalse(timeparse.is_duration('1 h', max_length=2))
+        self.assertFalse(timeparse.is_duration(' ' * 100000 + 'x', max_length=100))
+        self.assertTrue(timeparse.is_duration('-1h', max_value=3600))
+        self.assertFalse(timeparse.is_duration('1h 1ns', max_value=3600))
+        self.assertFalse(timeparse.is_duration('1e4', max_value=3600))
+        self.assertFalse(timeparse.is_duration(-3601, max_value=3600))
+
+    def test_timedelta_range(self):
+        for sval in ('999999999 days 23:59:59.9999994', '-999999999 days 0.0000005 s', '-999999999 days 1s'):
+            self.assertEqual(timeparse.is_duration(sval), timeparse.parse(sval) is not None, sval)
+
+
+class TestAdversarialInput(unittest.TestCase):
+    """
+    Parsing time of pathological strings should grow linearly with length.
+    """
+    length = 10000
+    budget = 1.0
+    # Linear parsing is 4 times slower on 4 times longer input, quadratic is 16 times.
+    max_ratio = 8
+    noise = 0.001
+    cases = {
+        'spaces': lambda n: ' ' * n + 'x',
+        'number and spaces': lambda n: '1' + ' ' * n + 'x',
+        'unit and spaces': lambda n: '1h' + ' ' * n + 'x',
+        'separator and spaces': lambda n: '1 h ,' + ' ' * n + 'x',
+        'all units and spaces': lambda n: '1 y 1 mo 1 w 1 d 1 h 1 m 1 s' + ' ' * n + 'x',
+        'trailing spaces': lambda n: '1h' + ' ' * n,
+        'digits': lambda n: '1' * n + 'x',
+        'dots': lambda n: '1.' * (n // 2) + 'x',
+        'units': lambda n: '1h ' * (n // 3) + 'x',
+        'numbers': lambda n: '1 ' * (n // 2) + 'x',
+        'colons': lambda n: '1:' * (n // 2) + 'x',
+        'range separators': lambda n: '1' + ' to' * (n // 3) + 'x',
+        'tabs and spaces': lambda n: '1' + ' \t' * (n // 2) + 't',
+        'parentheses': lambda n: '(' * n + '1h',
+        'operators': lambda n: '1h + ' * (n // 5) + 'x',
+        'multiplications': lambda n: '1h' + ' * 9' * (n // 4),
+        'unary minuses': lambda n: '-' * n + '1h',
+    }
+
+    functions = ('parse', 'is_duration', 'try_parse', 'parse_range', 'parse_expression')
+
+    def measure(self, function, sval):
+        # Collections of garbage left by other tests are not part of parsing time.
+        best = math.inf
+        gc.disable()
+        try:
+            for _ in range(5):
+                start = time.perf_counter()
+                function(sval)
+                best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+        return best
+
+    def test_budget(self):
+        for name, make in self.cases.items():
+            for function_name in self.functions:
+                function = getattr(timeparse, function_name)
+                short, long = self.measure(function, make(self.length)), self.measure(function, make(4 * self.length))
+                self.assertLess(long, self.budget, (name, function_name))
+                self.assertLess(long, short * self.max_ratio + self.noise, (name, function_name))
+
+    def test_nested_expression(self):
+        depth = self.length // 2
+        self.assertEqual(timeparse.parse_expression('(' * depth + '1h' + ')' * depth), 3600)
+        self.assertIsNone(timeparse.parse_expression('2 * ' * (self.length // 4) + '0s'))
+
+    def test_trailing_spaces(self):
+        self.assertEqual(timeparse.parse('1h' + ' ' * self.length), 3600)
+        self.assertEqual(timeparse.parse('1:30' + ' ' * self.length), 90)
+
+
+class TestProfile(unittest.TestCase):
+    """
+    Unit tests for `profile`.
+    """
+
+    def test_results(self):
+        values = ('1h 30m', '10', '-4:13:02', '1:30', ':30', 'PT1H', 'ten', 1.5)
+        kwargs_list = (
+            {}, {'granularity': 'minutes'}, {'as_timedelta': True}, {'as_nanoseconds': True}, {'dialect': 'go'},
+        )
+        expected = [[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list]
+        output = io.StringIO()
+        with timeparse.profile(output) as profile:
+            self.assertEqual(timeparse.COMPILED_SIGN.groupindex['sign'], 1)
+            self.assertEqual([[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list], expected)
+            self.assertEqual(timeparse.try_parse('1h 30x').error.position, 5)
+        self.assertIs(type(timeparse.COMPILED_SIGN), type(timeparse.COMPILED_FLOAT))
+        self.assertIsInstance(timeparse.COMPILED_TIMEFORMATS[0], type(timeparse.COMPILED_FLOAT))
+
+        stats = profile.stats
+        self.assertEqual(stats['total'][0], len(values) * len(kwargs_list))
+        self.assertEqual(stats['number'][0], len(values) * (len(kwargs_list) - 1))
+        for stage in ('normalization', 'sign', 'timeformats[0]', 'minutes timeformats[2]', 'iso8601', 'dialect',
+                      'all_digits', 'relativedelta', 'nanoseconds', 'conversion'):
+            self.assertGreater(stats[stage][0], 0, stage)
+        report = output.getvalue().splitlines()
+        self.assertEqual(report[0].split(), ['stage', 'calls', 'total,', 's', 'per', 'call,', 'us', 'share'])
+        self.assertEqual(report[1].split()[:2], ['total', str(stats['total'][0])])
+        self.assertTrue(report[1].endswith('100.0%'))
+        self.assertEqual(len(report), len(stats) + 1)
+
+    def test_stages(self):
+        with timeparse.profile() as profile:
+            self.assertEqual(timeparse.parse('- 5 M\u0130N'), -300)
+            self.assertEqual(timeparse.parse('4:32 \u03bcs', granularity='minutes'), None)
+        stats = profile.stats
+        self.assertEqual((stats['normalization'][0], stats['sign'][0]), (2, 2))
+        self.assertEqual(stats['unicode timeformats[0]'][0], 1)
+        self.assertEqual(stats['unicode minutes timeformats[0]'][0], 1)
+
+    def test_keywords(self):
+        with timeparse.profile() as profile:
+            self.assertEqual(timeparse.parse('1e20', overflow='saturate'), timedelta_max_seconds)
+            self.assertEqual(timeparse.parse(1e20, overflow='saturate'), timedelta_max_seconds)
+        self.assertEqual(profile.stats['number'][0], 2)
+        self.assertEqual(profile.stats['total'][0], 2)
+
+    def test_without_total(self):
+        with timeparse.profile() as profile:
+            self.assertTrue(timeparse.is_duration('1h'))
+        self.assertNotIn('total', profile.stats)
+        self.assertTrue(profile.report().splitlines()[1].endswith(' -'))
+
+
+class TestPersistentCache(unittest.TestCase):
+    """
+    Unit tests for `enable_cache`.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite')
+        timeparse.enable_cache(self.path, maxsize=2)
+        self.addCleanup(timeparse.disable_cache)
+
+    def query(self, sql):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(sql).fetchall()
+
+    @property
+    def prefix(self):
+        return f'{timeparse.__version__}:'
+
+    def test_results(self):
+        values = ('1h 30m', '-4:13:02', '1:30', 'PT1H', '1 min', 'ten', '1:30')
+        kwargs_list = ({}, {'granularity': 'minutes'}, {'as_timedelta': True}, {'as_nanoseconds': True})
+        cached = [[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list]
+        self.assertEqual(len(timeparse.PERSISTENT_CACHE.local), 2)
+        # 'ten' is not matched, so it is not written.
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [((len(set(values)) - 1) * 2,)])
+        self.assertEqual([[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list], cached)
+        timeparse.disable_cache()
+        self.assertIsNone(timeparse.PERSISTENT_CACHE)
+        self.assertEqual([[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list], cached)
+
+        self.assertIsNone(timeparse.parse('1 h', dialect='go'))
+        self.assertEqual(timeparse.parse('1h', dialect='go'), 3600)
+        self.assertEqual(self.query(f"SELECT key, value FROM matches WHERE key LIKE '{self.prefix}seconds:go:%'"), [])
+
+    def test_normalized_keys(self):
+        self.assertEqual([timeparse.parse(sval) for sval in ('5 min', ' 5  Min', '5\tMIN ')], [300, 300, 300])
+        self.assertEqual(self.query('SELECT key FROM matches'), [(f'{self.prefix}seconds::5 min',)])
+        self.assertEqual(timeparse.parse('1H', dialect='go'), None)
+        self.assertEqual(self.query(f"SELECT key FROM matches WHERE key LIKE '{self.prefix}seconds:go:%'"), [])
+
+    def test_limits(self):
+        self.assertEqual([timeparse.parse(f'junk {index}') for index in range(100)], [None] * 100)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(0,)])
+
+        timeparse.enable_cache(self.path, max_rows=3)
+        self.assertEqual([timeparse.parse(f'{index}h') for index in range(1, 6)], [3600 * i for i in range(1, 6)])
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(3,)])
+        self.assertEqual(self.query("SELECT value FROM meta WHERE name = 'rows'"), [('3',)])
+        self.assertEqual(timeparse.parse('1h'), 3600)
+        self.assertEqual(timeparse.parse('5h'), 18000)
+
+        self.query("DELETE FROM meta WHERE name = 'rows'")
+        timeparse.enable_cache(self.path, max_rows=4)
+        self.assertEqual(self.query("SELECT value FROM meta WHERE name = 'rows'"), [('3',)])
+        self.assertEqual(timeparse.parse('6h'), 21600)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(4,)])
+
+    def test_shared(self):
+        self.assertEqual(timeparse.parse('1h'), 3600)
+        self.assertEqual(self.query("SELECT value FROM meta WHERE name = 'version'"), [(timeparse.__version__,)])
+        self.query(f"""UPDATE matches SET value = '[1,"1h",{{"hours":"2"}}]' WHERE key = '{self.prefix}seconds::1h'""")
+        self.assertEqual(timeparse.parse('1h'), 3600)
+        self.assertEqual((timeparse.parse('1m'), timeparse.parse('1s')), (60, 1))
+        with mock.patch('os.getpid', return_value=-1):
+            self.assertEqual(timeparse.parse('1h'), 7200)
+            timeparse.enable_cache(self.path)
+            self.assertEqual(timeparse.parse('1h'), 7200)
+
+        self.query("UPDATE meta SET value = '0'")
+        timeparse.enable_cache(self.path)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(0,)])
+        self.assertEqual(timeparse.parse('1h'), 3600)
+
+    def test_other_version(self):
+        self.assertEqual(timeparse.parse('1h'), 3600)
+        # Database is reset by worker of other version after this one opened it.
+        self.query("UPDATE meta SET value = 'other' WHERE name = 'version'")
+        self.query('DELETE FROM matches')
+        self.assertEqual(timeparse.parse('2h'), 7200)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(0,)])
+        self.query("""INSERT INTO matches VALUES ('other:seconds::3h', '[1,"3h",{"hours":"4"}]')""")
+        self.assertEqual(timeparse.parse('3h'), 10800)
+
+    def test_errors(self):
+        self.assertEqual(timeparse.parse('1h'), 3600)
+        timeparse.PERSISTENT_CACHE.connection().execute('PRAGMA query_only=ON')
+        self.assertEqual(timeparse.parse('7h', raise_exception=True), 25200)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(1,)])
+        timeparse.PERSISTENT_CACHE.connection().close()
+        self.assertEqual(timeparse.parse('1 min', raise_exception=True), 60)
+
+        timeparse.enable_cache(self.path)
+        self.query(f"UPDATE matches SET value = 'broken' WHERE key = '{self.prefix}seconds::1h'")
+        self.query("DELETE FROM meta WHERE name = 'rows'")
+        self.assertEqual(timeparse.parse('1h', raise_exception=True), 3600)
+        self.assertEqual(timeparse.parse('8h', raise_exception=True), 28800)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(1,)])
+        with self.assertRaisesRegex(ValueError, "Invalid go duration: '1 h'"):
+            timeparse.parse('1 h', raise_exception=True, dialect='go')
+
+    def test_threads(self):
+        values = [f'{index} min' for index in range(300)]
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(timeparse.parse, values * 8))
+        self.assertEqual(results, [index * 60 for index in range(300)] * 8)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM matches'), [(300,)])
+        self.assertEqual(self.query("SELECT value FROM meta WHERE name = 'rows'"), [('300',)])
+
+
+class TestPreload(unittest.TestCase):
+    """
+    Unit tests for `preload`.
+    """
+
+    def setUp(self):
+        self.addCleanup(timeparse.clear_preloaded)
+
+    def test_results(self):
+        values = ('1h 30m', '-4:13:02', '1:30', 'PT1H', '1 min', 'ten', '1:30')
+        kwargs_list = ({}, {'granularity': 'minutes'}, {'as_timedelta': True}, {'as_nanoseconds': True})
+        expected = [[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list]
+        self.assertEqual(timeparse.preload(values), 6)
+        self.assertEqual(timeparse.preload(values[:2], granularity='minutes'), 2)
+        self.assertEqual(timeparse.preload(['1h', '1 h'], dialect='go'), 1)
+        self.assertEqual(timeparse.preload(['1h'], dialect='go'), 1)
+        self.assertEqual([[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list], expected)
+        self.assertEqual([[timeparse.parse(sval, **kwargs) for sval in values] for kwargs in kwargs_list], expected)
+        self.assertEqual(timeparse.try_parse('ten').error.position, 0)
+        self.assertEqual(timeparse.parse('1h', dialect='go'), 3600)
+        with self.assertRaises(TypeError):
+            timeparse.PRELOADED[('seconds', None)]['1h'] = (1, '1h', (('hours', '2'),))
+
+    def test_normalized_keys(self):
+        self.assertEqual(timeparse.preload(['5 Min', '5 min ', ' 5  MIN']), 1)
+        self.assertEqual(list(timeparse.PRELOADED[('seconds', None)]), ['5 min'])
+        with mock.patch.object(timeparse, '_match_expression') as match:
+            self.assertEqual(timeparse.parse('5\tmIN'), 300)
+        match.assert_not_called()
+        self.assertEqual(timeparse.preload(['1h', '1H'], dialect='go'), 1)
+
+    def test_dump(self):
+        timeparse.preload(['1h 30m', 'ten'])
+        timeparse.preload(['1m'], dialect='prometheus')
+        output = io.StringIO()
+        timeparse.dump_preloaded(output)
+        tables = timeparse.PRELOADED
+        timeparse.clear_preloaded()
+        self.assertIsNone(timeparse.PRELOADED)
+
+        timeparse.load_preloaded(io.StringIO(output.getvalue()))
+        self.assertEqual(timeparse.PRELOADED, tables)
+        self.assertEqual(timeparse.parse('1h 30m'), 5400)
+        self.assertEqual(timeparse.parse('1m', dialect='prometheus'), 60)
+
+        dumped = output.getvalue().replace('"30"', '"45"')
+        timeparse.load_preloaded(io.StringIO(dumped))
+        self.assertEqual(timeparse.parse('1h 30m'), 6300)
+        with self.assertRaisesRegex(ValueError, 'dumped by version 0.0'):
+            timeparse.load_preloaded(io.StringIO(dumped.replace(timeparse.__version__, '0.0')))
+
+
+class TestCommandLine(unittest.TestCase):
+    """
+    Unit tests for the command line interface.
+    """
+
+    def run_main(self, stdin, *args):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        stderr = io.StringIO()
+        with mock.patch('sys.stdin', io.TextIOWrapper(io.BytesIO(stdin.encode()))), \
+                mock.patch('sys.stdout', stdout), mock.patch('sys.stderr', stderr):
+            code = timeparse.main(list(args))
+        return code, stdout.buffer.getvalue().decode(), stderr.getvalue()
+
+    def test_formats(self):
+        stdin = '1h\n1h\nten\n2 days, 4:13:02.266\n-1.5 us\n'
+        self.assertEqual(self.run_main(stdin), (0, '3600\n3600\n\n187982.266\n-2e-06\n', ''))
+        self.assertEqual(
+            self.run_main(stdin, '--format', 'nanoseconds'),
+            (0, '3600000000000\n3600000000000\n\n187982266000000\n-1500\n', ''),
+        )
+        self.assertEqual(
+            self.run_main(stdin, '--format', 'iso'),
+            (0, 'PT1H\nPT1H\n\nP2DT4H13M2.266S\n-PT0.0000015S\n', ''),
+        )
+        self.assertEqual(self.run_main('4:32\n', '--granularity', 'minutes'), (0, '16320\n', ''))
+        self.assertEqual(self.run_main('1m\n1 min\n', '--dialect', 'go'), (0, '60\n\n', ''))
+
+    def test_batches(self):
+        stdin = ''.join(f'{index}m\n' for index in range(1000))
+        expected = ''.join(f'{index * 60}\n' for index in range(1000))
+        self.assertEqual(self.run_main(stdin, '--batch-size', '100'), (0, expected, ''))
+        self.assertEqual(self.run_main(stdin, '--batch-size', '100', '--jobs', '2'), (0, expected, ''))
+
+    def test_strict(self):
+        self.assertEqual(
+            self.run_main('1h\n1m\n1s\nten\n1h\n', '--strict', '--batch-size', '4'),
+            (1, '3600\n60\n1\n', 'timeparse: could not parse line 4\n'),
+        )
+        self.assertEqual(self.run_main('1h\n', '--strict'), (0, '3600\n', ''))
+
+    def test_iso8601_format(self):
+        self.assertEqual(timeparse.format_iso8601(0), 'PT0S')
+        self.assertEqual(timeparse.format_iso8601(86400 * 10 ** 9), 'P1D')
+        self.assertEqual(timeparse.format_iso8601(86401 * 10 ** 9), 'P1DT1S')
+        self.assertEqual(timeparse.format_iso8601(-61 * 10 ** 9 - 1), '-PT1M1.000000001S')
 
 
 class MiscTests(unittest.TestCase):
@@ -752,6 +1947,26 @@ class MiscTests(unittest.TestCase):
         """Run timeparse doctests."""
         self.assertTrue(doctest.testmod(timeparse, raise_on_error=True))
 
+    def test_interning(self):
+        self.assertIsNot(timeparse.parse('1h', as_timedelta=True), timeparse.parse('1h', as_timedelta=True))
+        timeparse.enable_interning(maxsize=2)
+        try:
+            first = timeparse.parse('1h', as_timedelta=True)
+            self.assertIs(timeparse.parse('60 min', as_timedelta=True), first)
+            self.assertIs(timeparse.try_parse('3600', as_timedelta=True).value, first)
+            self.assertIsNone(timeparse.parse('ten', as_timedelta=True))
+            self.assertEqual(timeparse.parse('1h'), 3600)
+            timeparse.parse('1m', as_timedelta=True)
+            timeparse.parse('1s', as_timedelta=True)
+            self.assertEqual(len(timeparse.INTERNED_RESULTS), 2)
+            self.assertIsNot(timeparse.parse('1h', as_timedelta=True), first)
+            timeparse.disable_dateutil()
+            self.assertIs(timeparse.parse('1m', as_timedelta=True), timeparse.parse('60s', as_timedelta=True))
+        finally:
+            timeparse.enable_dateutil()
+            timeparse.disable_interning()
+        self.assertIsNone(timeparse.INTERNED_RESULTS)
+
     def test_disable_dateutil(self):
         self.assertNotIsInstance(timeparse.parse('10:10', as_timedelta=True), datetime.timedelta)
         timeparse.disable_dateutil()